@@ -44,6 +44,7 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     "core",
     "rest_framework",
     "rest_framework.authtoken",
@@ -53,11 +54,13 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "core.middleware.MetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "core.middleware.ProfilingMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
@@ -86,17 +89,57 @@ WSGI_APPLICATION = "app.wsgi.application"
 # Database
 # https://docs.djangoproject.com/en/3.2/ref/settings/#databases
 
+# Connections come from a per-process pool of at most DB_POOL_MAX_SIZE
+# connections unless it is 0. DB_CONN_MAX_AGE keeps a connection per
+# thread open across requests instead.
+DB_POOL_MAX_SIZE = int(os.environ.get("DB_POOL_MAX_SIZE", 10))
+
 DATABASES = {
     "default": {
-        "ENGINE": "django.db.backends.postgresql",
+        "ENGINE": (
+            "core.db.backends.postgresql_pool"
+            if DB_POOL_MAX_SIZE
+            else "django.db.backends.postgresql"
+        ),
         "HOST": os.environ.get("DB_HOST"),
         "NAME": os.environ.get("DB_NAME"),
         "USER": os.environ.get("DB_USER"),
         "PASSWORD": os.environ.get("DB_PASS"),
+        "CONN_MAX_AGE": int(os.environ.get("DB_CONN_MAX_AGE", 0)),
+        "POOL": {
+            "MAX_SIZE": DB_POOL_MAX_SIZE,
+            # Seconds before a connection is replaced
+            "MAX_LIFETIME": int(os.environ.get("DB_POOL_MAX_LIFETIME", 3600)),
+            # Seconds to wait for a free connection
+            "TIMEOUT": float(os.environ.get("DB_POOL_TIMEOUT", 10)),
+            # Seconds idle after which a connection is pinged on checkout
+            "CHECK_AFTER": int(os.environ.get("DB_POOL_CHECK_AFTER", 30)),
+        },
     }
 }
 
 
+# Cache shared by all the app workers, holding the recipe data versions,
+# cached responses and token lookups. Without REDIS_URL every process gets
+# its own cache, and the recipe response cache is disabled as writes could
+# not invalidate it in the other workers.
+REDIS_URL = os.environ.get("REDIS_URL", "")
+
+if REDIS_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }
+    }
+
+
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
 
@@ -139,6 +182,15 @@ MEDIA_URL = "/static/media/"
 MEDIA_ROOT = "/vol/web/media"
 STATIC_ROOT = "/vol/web/static"
 
+# Uploads over 256KB are streamed to a temp file instead of memory and
+# uploads over MAX_UPLOAD_SIZE are dropped (matches the proxy's 10M limit)
+FILE_UPLOAD_MAX_MEMORY_SIZE = 256 * 1024
+FILE_UPLOAD_HANDLERS = [
+    "django.core.files.uploadhandler.MemoryFileUploadHandler",
+    "core.uploadhandlers.MaxSizeTemporaryFileUploadHandler",
+]
+MAX_UPLOAD_SIZE = int(os.environ.get("MAX_UPLOAD_SIZE", 10 * 1024 * 1024))
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/3.2/ref/settings/#default-auto-field
 
@@ -148,8 +200,85 @@ AUTH_USER_MODEL = "core.User"
 
 REST_FRAMEWORK = {
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
+    "DEFAULT_RENDERER_CLASSES": [
+        "core.renderers.ORJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
+    "DEFAULT_PARSER_CLASSES": [
+        "core.parsers.ORJSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ],
 }
 
+# Default and maximum page_size for the paginated list endpoints
+API_PAGE_SIZE = int(os.environ.get("API_PAGE_SIZE", 50))
+API_MAX_PAGE_SIZE = int(os.environ.get("API_MAX_PAGE_SIZE", 500))
+
+# Token to user lookups cached by user.authentication.CachedTokenAuthentication
+# in the shared cache and in a per-process LRU. The local TTL bounds how long
+# other processes may serve an invalidated token. Lookups are not cached
+# without a shared cache (REDIS_URL).
+TOKEN_AUTH_CACHE_TTL = int(os.environ.get("TOKEN_AUTH_CACHE_TTL", 300))
+TOKEN_AUTH_LOCAL_CACHE_TTL = int(os.environ.get("TOKEN_AUTH_LOCAL_CACHE_TTL", 5))
+TOKEN_AUTH_LOCAL_CACHE_SIZE = int(
+    os.environ.get("TOKEN_AUTH_LOCAL_CACHE_SIZE", 1024)
+)
+
+# Seconds a recipe/tag/ingredient list response is cached for. Cached
+# responses are also invalidated on any write to the user's recipe data.
+RECIPE_RESPONSE_CACHE_TTL = int(os.environ.get("RECIPE_RESPONSE_CACHE_TTL", 300))
+
+# Bearer token required to scrape /metrics, open to anyone when empty.
+# Set PROMETHEUS_MULTIPROC_DIR to aggregate the metrics of all workers.
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN", "")
+
+# Requests of staff users sending an X-Profile header, and a random
+# PROFILING_SAMPLE_RATE share (0 to 1) of all requests, are run under
+# cProfile. The newest PROFILING_MAX_PROFILES profiles and their SQL are
+# kept in PROFILING_DIR and listed on /api/profiles/.
+PROFILING_HEADER = "HTTP_X_PROFILE"
+PROFILING_SAMPLE_RATE = float(os.environ.get("PROFILING_SAMPLE_RATE", 0))
+PROFILING_DIR = os.environ.get("PROFILING_DIR", "/vol/profiles")
+PROFILING_MAX_PROFILES = int(os.environ.get("PROFILING_MAX_PROFILES", 200))
+
+# "uwsgi" (WSGI) or "asgi" (gunicorn with uvicorn workers), see
+# scripts/run.sh. Under ASGI the recipe, tag and ingredient list and
+# retrieve endpoints are served by async views unless RECIPE_ASYNC_VIEWS=0.
+APP_SERVER = os.environ.get("APP_SERVER", "uwsgi")
+RECIPE_ASYNC_VIEWS = bool(
+    int(os.environ.get("RECIPE_ASYNC_VIEWS", int(APP_SERVER == "asgi")))
+)
+
+# Maximum number of recipes accepted by one bulk request
+RECIPE_BULK_MAX_ITEMS = int(os.environ.get("RECIPE_BULK_MAX_ITEMS", 500))
+
+# Recipes fetched per server-side cursor round trip by the NDJSON export
+RECIPE_EXPORT_CHUNK_SIZE = int(os.environ.get("RECIPE_EXPORT_CHUNK_SIZE", 500))
+
+# Resized variants generated for uploaded recipe images, by name and the
+# maximum width/height in pixels, and the size of the process pool doing it
+RECIPE_IMAGE_VARIANTS = {
+    "thumb": 150,
+    "medium": 600,
+    "large": 1200,
+}
+RECIPE_IMAGE_WORKERS = int(os.environ.get("RECIPE_IMAGE_WORKERS", 2))
+
+# Uploaded recipe images larger than this many pixels are rejected and
+# those wider or taller than the max dimension are downscaled on upload
+RECIPE_IMAGE_MAX_PIXELS = int(
+    os.environ.get("RECIPE_IMAGE_MAX_PIXELS", 40_000_000)
+)
+RECIPE_IMAGE_MAX_DIMENSION = int(
+    os.environ.get("RECIPE_IMAGE_MAX_DIMENSION", 4096)
+)
+
+# Default and maximum number of names returned by the tag and ingredient
+# autocomplete endpoints
+AUTOCOMPLETE_LIMIT = int(os.environ.get("AUTOCOMPLETE_LIMIT", 10))
+AUTOCOMPLETE_MAX_LIMIT = int(os.environ.get("AUTOCOMPLETE_MAX_LIMIT", 50))
+
 SPECTACULAR_SETTINGS = {
     "COMPONENT_SPLIT_REQUEST": True,
 }
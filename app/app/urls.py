@@ -20,6 +20,9 @@ from django.urls import path, include
 from django.conf.urls.static import static
 from django.conf import settings
 
+from core.metrics import metrics_view
+from core.views import ProfileFileView, ProfileListView
+
 
 urlpatterns = [
     path("admin/", admin.site.urls),
@@ -31,6 +34,13 @@ urlpatterns = [
     ),
     path("api/user/", include("user.urls")),
     path("api/recipe/", include("recipe.urls")),
+    path("metrics", metrics_view, name="metrics"),
+    path("api/profiles/", ProfileListView.as_view(), name="profile-list"),
+    path(
+        "api/profiles/<str:profile_id>/<str:kind>/",
+        ProfileFileView.as_view(),
+        name="profile-file",
+    ),
 ]
 
 if settings.DEBUG:
@@ -0,0 +1,15 @@
+"""
+Helpers for the configured Django caches
+"""
+
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+
+# Backends keeping their entries private to each process
+PROCESS_LOCAL_BACKENDS = (DummyCache, LocMemCache)
+
+
+def is_shared_cache(alias="default"):
+    """Return whether every app process sees the same cache entries"""
+    return not isinstance(caches[alias], PROCESS_LOCAL_BACKENDS)
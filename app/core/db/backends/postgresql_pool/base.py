@@ -0,0 +1,37 @@
+"""
+PostgreSQL backend reusing connections from a per-process pool
+"""
+
+import functools
+
+from django.db.backends.postgresql import base
+from django.utils.asyncio import async_unsafe
+
+from core.db.pool import get_pool
+from core.db.backends.postgresql_pool.creation import DatabaseCreation
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """PostgreSQL wrapper checking connections out of a pool.
+
+    Closing a connection, which Django does at the end of every request
+    unless CONN_MAX_AGE is set, returns it to the pool instead.
+    """
+
+    creation_class = DatabaseCreation
+
+    @async_unsafe
+    def get_new_connection(self, conn_params):
+        connection = get_pool(self.settings_dict).get(
+            functools.partial(super().get_new_connection, conn_params),
+        )
+        self.isolation_level = self.settings_dict["OPTIONS"].get(
+            "isolation_level",
+            connection.isolation_level,
+        )
+        return connection
+
+    def _close(self):
+        if self.connection is not None:
+            with self.wrap_database_errors:
+                get_pool(self.settings_dict).put(self.connection)
@@ -0,0 +1,184 @@
+"""
+Thread-safe pool of database connections for one process
+"""
+
+import collections
+import os
+import threading
+import time
+
+import psycopg2
+from psycopg2 import extensions
+
+POOL_DEFAULTS = {
+    "MAX_SIZE": 10,
+    "MAX_LIFETIME": 3600,
+    "TIMEOUT": 10,
+    "CHECK_AFTER": 30,
+}
+
+
+class PooledConnection:
+    """A raw connection with the times the pool tracks for it."""
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.created_at = time.monotonic()
+        self.returned_at = self.created_at
+
+
+class ConnectionPool:
+    """Bounded pool of psycopg2 connections.
+
+    At most max_size connections are checked out at once, callers wait
+    up to timeout seconds for one to be returned. Connections older
+    than max_lifetime are closed instead of reused, and connections idle
+    for longer than check_after are pinged before they are handed out.
+    Returned connections are rolled back and their session state is
+    discarded, or closed if that fails.
+    """
+
+    def __init__(self, max_size, max_lifetime, timeout, check_after):
+        self.max_size = max_size
+        self.max_lifetime = max_lifetime
+        self.timeout = timeout
+        self.check_after = check_after
+        self._idle = collections.deque()
+        self._checked_out = {}
+        self._slots = threading.BoundedSemaphore(max_size)
+        self._lock = threading.Lock()
+
+    def get(self, connect):
+        """Return an idle healthy connection, or a new one from connect()"""
+        if not self._slots.acquire(timeout=self.timeout):
+            raise psycopg2.OperationalError(
+                f"No database connection was returned to the pool of "
+                f"{self.max_size} within {self.timeout} seconds.",
+            )
+        try:
+            pooled = self._get_idle() or PooledConnection(connect())
+        except BaseException:
+            self._slots.release()
+            raise
+        with self._lock:
+            self._checked_out[id(pooled.connection)] = pooled
+        return pooled.connection
+
+    def _get_idle(self):
+        """Pop idle connections until one passes the health checks"""
+        while True:
+            with self._lock:
+                if not self._idle:
+                    return None
+                # Most recently returned first, so extra ones age out
+                pooled = self._idle.pop()
+            if self._is_usable(pooled, checkout=True):
+                return pooled
+            self._discard(pooled)
+
+    def put(self, connection):
+        """Return a checked out connection to the pool"""
+        with self._lock:
+            pooled = self._checked_out.pop(id(connection), None)
+        if pooled is None:
+            connection.close()
+            return
+        try:
+            if self._reset(pooled):
+                pooled.returned_at = time.monotonic()
+                with self._lock:
+                    self._idle.append(pooled)
+            else:
+                self._discard(pooled)
+        finally:
+            self._slots.release()
+
+    def close(self):
+        """Close every idle connection"""
+        with self._lock:
+            idle, self._idle = self._idle, collections.deque()
+        for pooled in idle:
+            self._discard(pooled)
+
+    def _is_usable(self, pooled, checkout=False):
+        connection = pooled.connection
+        now = time.monotonic()
+        if connection.closed or now - pooled.created_at > self.max_lifetime:
+            return False
+        status = connection.get_transaction_status()
+        if status != extensions.TRANSACTION_STATUS_IDLE:
+            return False
+        if checkout and now - pooled.returned_at > self.check_after:
+            try:
+                with connection.cursor() as cursor:
+                    cursor.execute("SELECT 1")
+            except psycopg2.Error:
+                return False
+        return True
+
+    def _reset(self, pooled):
+        """Clear what the last user left behind, return if reusable"""
+        connection = pooled.connection
+        if connection.closed:
+            return False
+        try:
+            if (
+                connection.get_transaction_status()
+                != extensions.TRANSACTION_STATUS_IDLE
+            ):
+                connection.rollback()
+            # Session settings, temp tables, advisory locks, held cursors
+            # and prepared statements must not leak into the next checkout.
+            # DISCARD ALL can not run inside a transaction block.
+            autocommit = connection.autocommit
+            connection.autocommit = True
+            with connection.cursor() as cursor:
+                cursor.execute("DISCARD ALL")
+            connection.autocommit = autocommit
+        except psycopg2.Error:
+            return False
+        return self._is_usable(pooled)
+
+    def _discard(self, pooled):
+        try:
+            pooled.connection.close()
+        except psycopg2.Error:
+            pass
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(settings_dict):
+    """Return the pool of the current process for a database"""
+    # Forked workers must not share the sockets of their parent
+    key = (
+        os.getpid(),
+        settings_dict["HOST"],
+        settings_dict["PORT"],
+        settings_dict["USER"],
+        settings_dict["NAME"],
+    )
+    with _pools_lock:
+        if key not in _pools:
+            options = {**POOL_DEFAULTS, **settings_dict.get("POOL", {})}
+            _pools[key] = ConnectionPool(
+                max_size=options["MAX_SIZE"],
+                max_lifetime=options["MAX_LIFETIME"],
+                timeout=options["TIMEOUT"],
+                check_after=options["CHECK_AFTER"],
+            )
+        return _pools[key]
+
+
+def close_pools(name=None):
+    """Close the idle pooled connections of this process, or of one db"""
+    with _pools_lock:
+        pools = [
+            pool
+            for (pid, *_, pool_name), pool in _pools.items()
+            if pid == os.getpid() and name in (None, pool_name)
+        ]
+    for pool in pools:
+        pool.close()
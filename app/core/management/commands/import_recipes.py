@@ -0,0 +1,297 @@
+"""
+Django command to bulk import recipes with Postgres COPY
+"""
+
+import csv
+import io
+import json
+import sys
+import time
+from decimal import Decimal, InvalidOperation
+
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from core.models import Recipe, Tag, Ingredient
+from recipe.cache import bump_version
+
+
+def copy_rows(cursor, table, columns, rows):
+    """Load rows into table with a single COPY FROM STDIN"""
+    if not rows:
+        return
+    buffer = io.StringIO()
+    # Quote strings so empty values load as '' rather than NULL
+    writer = csv.writer(buffer, quoting=csv.QUOTE_NONNUMERIC)
+    writer.writerows(rows)
+    buffer.seek(0)
+    cursor.copy_expert(
+        f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)",
+        buffer,
+    )
+
+
+def reserve_ids(cursor, model, count):
+    """Return count new primary keys from the sequence of model"""
+    if not count:
+        return []
+    cursor.execute(
+        "SELECT nextval(pg_get_serial_sequence(%s, 'id')) "
+        "FROM generate_series(1, %s)",
+        [model._meta.db_table, count],
+    )
+    return [row[0] for row in cursor.fetchall()]
+
+
+class NameResolver:
+    """Map (user, name) to ids for tags or ingredients, creating new ones.
+
+    Known names are kept in memory for the whole import, so each name is
+    looked up or inserted once per user.
+    """
+
+    def __init__(self, model):
+        self.model = model
+        self.ids = {}
+        self.created = 0
+
+    def resolve(self, cursor, keys):
+        """Make sure every (user_id, name) in keys has an id"""
+        missing = {key for key in keys if key not in self.ids}
+        if not missing:
+            return
+        existing = self.model.objects.filter(
+            user_id__in={user_id for user_id, _ in missing},
+            name__in={name for _, name in missing},
+        ).values_list("user_id", "name", "id")
+        for user_id, name, obj_id in existing:
+            if (user_id, name) in missing:
+                self.ids[(user_id, name)] = obj_id
+                missing.discard((user_id, name))
+
+        missing = sorted(missing)
+        new_ids = reserve_ids(cursor, self.model, len(missing))
+        copy_rows(
+            cursor,
+            self.model._meta.db_table,
+            ["id", "user_id", "name"],
+            [
+                (obj_id, user_id, name)
+                for obj_id, (user_id, name) in zip(new_ids, missing)
+            ],
+        )
+        self.ids.update(zip(missing, new_ids))
+        self.created += len(missing)
+
+
+class Command(BaseCommand):
+    """Django command to bulk import recipes."""
+
+    help = (
+        "Import recipes from an NDJSON or CSV file using Postgres COPY. "
+        "Each record has user (email), title, time_minutes, price and "
+        "optionally description, link, tags and ingredients. In CSV, "
+        "tags and ingredients are separated by '|'."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Input file, or - for stdin.")
+        parser.add_argument(
+            "--format",
+            choices=["ndjson", "csv"],
+            help="Input format, guessed from the file extension by default.",
+        )
+        parser.add_argument(
+            "--user",
+            help="Email of the user for records without a user.",
+        )
+        parser.add_argument("--batch-size", type=int, default=10000)
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        input_format = options["format"] or (
+            "csv" if path.endswith(".csv") else "ndjson"
+        )
+        self.default_user = options["user"]
+        self.users = {}
+        self.tags = NameResolver(Tag)
+        self.ingredients = NameResolver(Ingredient)
+        self.touched_users = set()
+
+        stream = sys.stdin if path == "-" else open(path, newline="")
+        start = time.perf_counter()
+        total = 0
+        try:
+            batch = []
+            for line_number, record in self._read(stream, input_format):
+                batch.append((line_number, record))
+                if len(batch) >= options["batch_size"]:
+                    total += self._import_batch(batch)
+                    batch = []
+                    self._report(total, start)
+            total += self._import_batch(batch)
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+            # Batches committed before a failure changed these users too
+            for user_id in self.touched_users:
+                bump_version(user_id)
+
+        elapsed = time.perf_counter() - start
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Imported {total} recipes, {self.tags.created} tags and "
+                f"{self.ingredients.created} ingredients in {elapsed:.2f}s "
+                f"({total / elapsed if elapsed else 0:.0f} rows/sec)"
+            )
+        )
+
+    def _report(self, total, start):
+        elapsed = time.perf_counter() - start
+        self.stdout.write(
+            f"{total} recipes ({total / elapsed if elapsed else 0:.0f} "
+            "rows/sec)"
+        )
+
+    def _read(self, stream, input_format):
+        """Yield (line number, record) pairs from the input"""
+        if input_format == "csv":
+            records = csv.DictReader(stream)
+            for line_number, record in enumerate(records, start=2):
+                for field in ["tags", "ingredients"]:
+                    record[field] = (record.get(field) or "").split("|")
+                yield line_number, record
+            return
+
+        for line_number, line in enumerate(stream, start=1):
+            if line.strip():
+                try:
+                    yield line_number, json.loads(line)
+                except ValueError as e:
+                    raise CommandError(f"Line {line_number}: {e}")
+
+    def _names(self, values):
+        """Return unique names from a list of strings or {"name": ...}"""
+        names = (
+            value["name"] if isinstance(value, dict) else value
+            for value in values or []
+        )
+        return list(dict.fromkeys(filter(None, map(str.strip, names))))
+
+    def _user_ids(self, batch):
+        """Return user ids by email for every record in the batch"""
+        emails = {
+            record.get("user") or self.default_user for _, record in batch
+        }
+        missing = emails - set(self.users)
+        if missing:
+            self.users.update(
+                get_user_model()
+                .objects.filter(email__in=missing)
+                .values_list("email", "id")
+            )
+        unknown = emails - set(self.users)
+        if unknown:
+            raise CommandError(
+                f"Unknown users: {', '.join(map(str, unknown))}",
+            )
+        return self.users
+
+    def _validate(self, model, field_name, values):
+        """Run the model field validators, COPY does not report the row"""
+        field = model._meta.get_field(field_name)
+        for value in values:
+            try:
+                field.run_validators(value)
+            except ValidationError as e:
+                raise ValidationError(
+                    f"{model._meta.model_name} {field_name}: "
+                    f"{' '.join(e.messages)}"
+                )
+
+    def _parse(self, line_number, record, users):
+        """Return a validated recipe row with its tag and ingredient names"""
+        try:
+            row = (
+                users[record.get("user") or self.default_user],
+                record["title"],
+                record.get("description") or "",
+                int(record["time_minutes"]),
+                Decimal(str(record["price"])).quantize(Decimal("0.01")),
+                record.get("link") or "",
+                self._names(record.get("tags")),
+                self._names(record.get("ingredients")),
+            )
+            for index, field_name in enumerate(
+                ["title", "description", "time_minutes", "price", "link"],
+                start=1,
+            ):
+                self._validate(Recipe, field_name, [row[index]])
+            self._validate(Tag, "name", row[6])
+            self._validate(Ingredient, "name", row[7])
+        except (KeyError, TypeError, ValueError, InvalidOperation) as e:
+            raise CommandError(f"Record {line_number}: invalid value {e}")
+        except ValidationError as e:
+            raise CommandError(f"Record {line_number}: {e.messages[0]}")
+        return row
+
+    @transaction.atomic
+    def _import_batch(self, batch):
+        """Load one batch of records and return the number of recipes"""
+        if not batch:
+            return 0
+        users = self._user_ids(batch)
+        rows = [self._parse(line, record, users) for line, record in batch]
+
+        with connection.cursor() as cursor:
+            self.tags.resolve(
+                cursor,
+                [(row[0], name) for row in rows for name in row[6]],
+            )
+            self.ingredients.resolve(
+                cursor,
+                [(row[0], name) for row in rows for name in row[7]],
+            )
+            recipe_ids = reserve_ids(cursor, Recipe, len(rows))
+            copy_rows(
+                cursor,
+                Recipe._meta.db_table,
+                [
+                    "id",
+                    "user_id",
+                    "title",
+                    "description",
+                    "time_minutes",
+                    "price",
+                    "link",
+                ],
+                [
+                    (recipe_id, *row[:6])
+                    for recipe_id, row in zip(recipe_ids, rows)
+                ],
+            )
+            copy_rows(
+                cursor,
+                Recipe.tags.through._meta.db_table,
+                ["recipe_id", "tag_id"],
+                [
+                    (recipe_id, self.tags.ids[(row[0], name)])
+                    for recipe_id, row in zip(recipe_ids, rows)
+                    for name in row[6]
+                ],
+            )
+            copy_rows(
+                cursor,
+                Recipe.ingredients.through._meta.db_table,
+                ["recipe_id", "ingredient_id"],
+                [
+                    (recipe_id, self.ingredients.ids[(row[0], name)])
+                    for recipe_id, row in zip(recipe_ids, rows)
+                    for name in row[7]
+                ],
+            )
+
+        self.touched_users.update(row[0] for row in rows)
+        return len(rows)
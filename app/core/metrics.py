@@ -0,0 +1,177 @@
+"""
+Prometheus metrics of the HTTP requests served by the app.
+
+With PROMETHEUS_MULTIPROC_DIR set, every worker process writes its
+samples to files in that directory and the metrics view aggregates them,
+so a scrape covers all uWSGI or gunicorn workers.
+"""
+
+import contextlib
+import contextvars
+import os
+import time
+
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.http import HttpResponse
+from django.utils.crypto import constant_time_compare
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+# Label of requests that did not resolve to a URL pattern
+UNMATCHED_VIEW = "<unmatched>"
+
+REQUEST_DURATION = Histogram(
+    "django_http_request_duration_seconds",
+    "Time from the request reaching Django to the response headers.",
+    ["view", "method"],
+    buckets=(
+        0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75,
+        1.0, 2.5, 5.0, 10.0,
+    ),
+)
+RESPONSES = Counter(
+    "django_http_responses",
+    "Responses by view, method and status code.",
+    ["view", "method", "status"],
+)
+RESPONSE_SIZE = Histogram(
+    "django_http_response_size_bytes",
+    "Size of the response bodies, streaming responses excluded.",
+    ["view"],
+    buckets=(256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304),
+)
+REQUEST_DB_QUERIES = Histogram(
+    "django_http_request_db_queries",
+    "Database queries run per request.",
+    ["view"],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100),
+)
+REQUEST_DB_DURATION = Histogram(
+    "django_http_request_db_duration_seconds",
+    "Time spent in database queries per request.",
+    ["view"],
+    buckets=(
+        0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+        1.0, 2.5,
+    ),
+)
+
+
+class QueryStats:
+    """Number and total duration of the queries of one request.
+
+    With log set, also keeps the SQL, number of parameters and duration of
+    every query.
+    """
+
+    def __init__(self, log=False):
+        self.count = 0
+        self.duration = 0.0
+        self.queries = [] if log else None
+
+
+# The active QueryStats, outermost first. Copied into the threads
+# sync_to_async runs code in.
+_query_stats = contextvars.ContextVar("query_stats", default=())
+
+
+@contextlib.contextmanager
+def record_queries(log=False):
+    """Count the queries run in the block"""
+    stats = QueryStats(log)
+    token = _query_stats.set(_query_stats.get() + (stats,))
+    try:
+        yield stats
+    finally:
+        _query_stats.reset(token)
+
+
+def _logged_query(sql, params, many):
+    # Parameter values are left out, as they may be secrets such as the
+    # token keys of authtoken_token and the profiles are shared with staff
+    if many:
+        return {"sql": sql, "many": True}
+    return {"sql": sql, "param_count": len(params) if params else 0}
+
+
+def _query_recorder(execute, sql, params, many, context):
+    active = _query_stats.get()
+    if not active:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        duration = time.perf_counter() - start
+        for stats in active:
+            stats.count += 1
+            stats.duration += duration
+            if stats.queries is not None:
+                stats.queries.append(
+                    {
+                        **_logged_query(sql, params, many),
+                        "duration": duration,
+                    }
+                )
+
+
+def install_query_recorder(sender, connection, **kwargs):
+    """Time the queries of every new connection"""
+    if _query_recorder not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_query_recorder)
+
+
+connection_created.connect(install_query_recorder)
+
+
+def view_name(request):
+    """Return the metrics label of the view that served request"""
+    match = getattr(request, "resolver_match", None)
+    if match is None:
+        return UNMATCHED_VIEW
+    return match.view_name
+
+
+def observe(request, response, duration, stats):
+    """Record the metrics of a served request"""
+    view = view_name(request)
+    REQUEST_DURATION.labels(view, request.method).observe(duration)
+    RESPONSES.labels(view, request.method, response.status_code).inc()
+    if not response.streaming:
+        RESPONSE_SIZE.labels(view).observe(len(response.content))
+    REQUEST_DB_QUERIES.labels(view).observe(stats.count)
+    REQUEST_DB_DURATION.labels(view).observe(stats.duration)
+
+
+def get_registry():
+    """Return the registry of this process or of all the workers"""
+    if "PROMETHEUS_MULTIPROC_DIR" not in os.environ:
+        return REGISTRY
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return registry
+
+
+def metrics_view(request):
+    """Return the metrics in the Prometheus text format.
+
+    Requires the METRICS_TOKEN bearer token when one is configured.
+    """
+    if settings.METRICS_TOKEN:
+        expected = f"Bearer {settings.METRICS_TOKEN}"
+        given = request.META.get("HTTP_AUTHORIZATION", "")
+        if not constant_time_compare(given, expected):
+            return HttpResponse(status=401)
+
+    return HttpResponse(
+        generate_latest(get_registry()),
+        content_type=CONTENT_TYPE_LATEST,
+    )
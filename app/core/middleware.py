@@ -0,0 +1,158 @@
+"""
+Middleware for the app
+"""
+
+import asyncio
+import cProfile
+import random
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from rest_framework.exceptions import AuthenticationFailed
+
+from core import metrics, profiling
+from user.authentication import CachedTokenAuthentication
+
+
+class MetricsMiddleware:
+    """Record Prometheus metrics of every request.
+
+    Latency, status code, response size and the number and time of
+    database queries, labelled by the URL name of the view. Should come
+    first in MIDDLEWARE so the latency covers the other middleware.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            # Lets Django call the instance as an async middleware
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self):
+            return self.__acall__(request)
+        with metrics.record_queries() as stats:
+            start = time.perf_counter()
+            response = self.get_response(request)
+        metrics.observe(request, response, time.perf_counter() - start, stats)
+        return response
+
+    async def __acall__(self, request):
+        with metrics.record_queries() as stats:
+            start = time.perf_counter()
+            response = await self.get_response(request)
+        metrics.observe(request, response, time.perf_counter() - start, stats)
+        return response
+
+
+def is_staff_request(request):
+    """Return whether request comes from a staff user.
+
+    Checks the session user and the API token, as the middleware runs
+    before DRF authenticates the request.
+    """
+    user = getattr(request, "user", None)
+    if user is not None and user.is_staff:
+        return True
+    try:
+        result = CachedTokenAuthentication().authenticate(request)
+    except AuthenticationFailed:
+        return False
+    return result is not None and result[0].is_staff
+
+
+class ProfilingMiddleware:
+    """Run requests under cProfile and store the profile and SQL log.
+
+    Profiles the requests of staff users sending the PROFILING_HEADER
+    header, and a PROFILING_SAMPLE_RATE share of all requests. The
+    profile id is returned in the X-Profile-Id header and the profiles
+    are listed on the staff only /api/profiles/ endpoint.
+
+    With async views the profile covers the event loop thread, so the
+    queries run in sync_to_async threads show as waits there, and other
+    requests served concurrently are included. The SQL log is complete.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        # Requests share the event loop thread, profiled one at a time
+        self.profiling_async = False
+        if asyncio.iscoroutinefunction(get_response):
+            # Lets Django call the instance as an async middleware
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def _sampled(self):
+        return random.random() < settings.PROFILING_SAMPLE_RATE
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self):
+            return self.__acall__(request)
+        sampled = self._sampled()
+        requested = settings.PROFILING_HEADER in request.META
+        if not sampled and not (requested and is_staff_request(request)):
+            return self.get_response(request)
+
+        profiler = cProfile.Profile()
+        with metrics.record_queries(log=True) as stats:
+            start = time.perf_counter()
+            response = profiler.runcall(self.get_response, request)
+        duration = time.perf_counter() - start
+        return self.save(request, response, duration, profiler, stats, sampled)
+
+    async def __acall__(self, request):
+        sampled = self._sampled()
+        requested = settings.PROFILING_HEADER in request.META
+        profile = sampled or (
+            requested and await sync_to_async(is_staff_request)(request)
+        )
+        if not profile or self.profiling_async:
+            return await self.get_response(request)
+
+        profiler = cProfile.Profile()
+        with metrics.record_queries(log=True) as stats:
+            start = time.perf_counter()
+            self.profiling_async = True
+            profiler.enable()
+            try:
+                response = await self.get_response(request)
+            finally:
+                profiler.disable()
+                self.profiling_async = False
+        duration = time.perf_counter() - start
+        return await sync_to_async(self.save)(
+            request,
+            response,
+            duration,
+            profiler,
+            stats,
+            sampled,
+        )
+
+    def save(self, request, response, duration, profiler, stats, sampled):
+        """Store the profile of a request and return the response"""
+        profile_id = profiling.new_profile_id()
+        profiling.save_profile(
+            profile_id,
+            profiler,
+            {
+                "method": request.method,
+                "path": request.get_full_path(),
+                "view": metrics.view_name(request),
+                "status": response.status_code,
+                "duration": duration,
+                "query_count": stats.count,
+                "query_duration": stats.duration,
+                "sampled": sampled,
+            },
+            stats.queries,
+        )
+        response["X-Profile-Id"] = profile_id
+        return response
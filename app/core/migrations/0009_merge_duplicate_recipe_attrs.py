@@ -0,0 +1,52 @@
+from django.db import migrations
+
+# Through rows of duplicates are copied to the kept (lowest id) object
+# unless the recipe already has it, then the duplicates are deleted.
+MERGE_DUPLICATES = """
+CREATE TEMPORARY TABLE {table}_duplicates ON COMMIT DROP AS
+SELECT id, keep_id FROM (
+    SELECT id, min(id) OVER (PARTITION BY user_id, name) AS keep_id
+    FROM {table}
+) AS grouped
+WHERE id <> keep_id;
+
+INSERT INTO {through} (recipe_id, {column})
+SELECT DISTINCT through.recipe_id, duplicates.keep_id
+FROM {through} AS through
+JOIN {table}_duplicates AS duplicates ON through.{column} = duplicates.id
+ON CONFLICT DO NOTHING;
+
+DELETE FROM {through} AS through
+USING {table}_duplicates AS duplicates
+WHERE through.{column} = duplicates.id;
+
+DELETE FROM {table} AS attr
+USING {table}_duplicates AS duplicates
+WHERE attr.id = duplicates.id;
+"""
+
+
+def merge_duplicates(apps, schema_editor):
+    """Merge tags and ingredients sharing a name for the same user"""
+    Recipe = apps.get_model("core", "Recipe")
+    for field_name in ["tags", "ingredients"]:
+        field = Recipe._meta.get_field(field_name)
+        through = field.remote_field.through
+        schema_editor.execute(
+            MERGE_DUPLICATES.format(
+                table=field.related_model._meta.db_table,
+                through=through._meta.db_table,
+                column=field.m2m_reverse_name(),
+            )
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_attr_name_autocomplete_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicates, migrations.RunPython.noop),
+    ]
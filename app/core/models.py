@@ -6,13 +6,19 @@ import uuid
 import os
 
 from django.conf import settings
-from django.db import models
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.search import SearchVectorField
+from django.db import connections, models
+from django.db.models import F
+from django.db.models.functions import Upper
 from django.contrib.auth.models import (
     AbstractBaseUser,
     BaseUserManager,
     PermissionsMixin,
 )
 
+from core.storage import ContentAddressedStorage
+
 
 def recipe_image_file_path(instance, filename):
     """Generate file path for new recipe image"""
@@ -45,6 +51,50 @@ class UserManager(BaseUserManager):
         return user
 
 
+class RecipeAttrManager(models.Manager):
+    """Manager for the named attributes attached to recipes."""
+
+    def get_or_create_many(self, user, names):
+        """Return objects for names, creating the missing ones.
+
+        Runs one INSERT ... ON CONFLICT DO NOTHING for every name, so
+        concurrent requests creating the same name cannot fail, and one
+        SELECT for the names that already existed. The rows are inserted
+        in name order, so requests with overlapping names in different
+        orders wait for each other instead of deadlocking.
+        """
+        names = list(dict.fromkeys(names))
+        if not names:
+            return []
+
+        with connections[self.db].cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {self.model._meta.db_table} (user_id, name) "
+                "SELECT %s, name FROM unnest(%s::varchar[]) AS name "
+                "ORDER BY name "
+                "ON CONFLICT (user_id, name) DO NOTHING "
+                "RETURNING id, name",
+                [user.pk, names],
+            )
+            objects = {
+                name: self.model.from_db(
+                    self.db,
+                    ["id", "name", "user_id"],
+                    (obj_id, name, user.pk),
+                )
+                for obj_id, name in cursor.fetchall()
+            }
+
+        existing = [name for name in names if name not in objects]
+        if existing:
+            objects.update(
+                (obj.name, obj)
+                for obj in self.filter(user=user, name__in=existing)
+            )
+
+        return [objects[name] for name in names]
+
+
 class User(AbstractBaseUser, PermissionsMixin):
     """User in the system."""
 
@@ -72,7 +122,24 @@ class Recipe(models.Model):
     link = models.CharField(max_length=255, blank=True)
     tags = models.ManyToManyField("Tag")
     ingredients = models.ManyToManyField("Ingredient")
-    image = models.ImageField(null=True, upload_to=recipe_image_file_path)
+    image = models.ImageField(
+        null=True,
+        upload_to=recipe_image_file_path,
+        storage=ContentAddressedStorage(),
+        db_index=True,
+    )
+    # Weighted title/description vector maintained by a database trigger
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    class Meta:
+        indexes = [
+            GinIndex(fields=["search_vector"]),
+            # Serves the per user list ordering
+            models.Index(
+                fields=["user", "-id"],
+                name="core_recipe_user_recent",
+            ),
+        ]
 
     def __str__(self):
         return self.title
@@ -87,6 +154,25 @@ class Tag(models.Model):
         on_delete=models.CASCADE,
     )
 
+    objects = RecipeAttrManager()
+
+    class Meta:
+        constraints = [
+            # Also serves the per user list ordering by name
+            models.UniqueConstraint(
+                fields=["user", "name"],
+                name="core_tag_user_name_unique",
+            ),
+        ]
+        indexes = [
+            # Prefix autocomplete, a trigram index is added when available
+            models.Index(
+                F("user"),
+                OpClass(Upper("name"), name="text_pattern_ops"),
+                name="core_tag_name_prefix",
+            ),
+        ]
+
     def __str__(self):
         return self.name
 
@@ -100,5 +186,24 @@ class Ingredient(models.Model):
         on_delete=models.CASCADE,
     )
 
+    objects = RecipeAttrManager()
+
+    class Meta:
+        constraints = [
+            # Also serves the per user list ordering by name
+            models.UniqueConstraint(
+                fields=["user", "name"],
+                name="core_ingredient_user_name_unique",
+            ),
+        ]
+        indexes = [
+            # Prefix autocomplete, a trigram index is added when available
+            models.Index(
+                F("user"),
+                OpClass(Upper("name"), name="text_pattern_ops"),
+                name="core_ingredient_name_prefix",
+            ),
+        ]
+
     def __str__(self):
         return self.name
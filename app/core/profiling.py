@@ -0,0 +1,87 @@
+"""
+Storage of the request profiles written by core.middleware.ProfilingMiddleware.
+
+Every profile is a cProfile dump and a JSON file with the request info and
+its SQL queries, both named after the profile id.
+"""
+
+import datetime
+import json
+import os
+import re
+import uuid
+
+from django.conf import settings
+
+# Generated ids only, so ids from URLs can not escape PROFILING_DIR
+PROFILE_ID_RE = re.compile(r"^\d{8}T\d{6}-[0-9a-f]{32}$")
+
+# File suffix of each kind of file stored for a profile
+PROFILE_FILES = {"profile": ".prof", "sql": ".json"}
+
+
+def new_profile_id():
+    """Return a new profile id, sorting by creation time"""
+    now = datetime.datetime.now(datetime.timezone.utc)
+    return f"{now:%Y%m%dT%H%M%S}-{uuid.uuid4().hex}"
+
+
+def profile_path(profile_id, kind):
+    """Return the path of a file of a profile, None for invalid ids"""
+    if kind not in PROFILE_FILES or not PROFILE_ID_RE.match(profile_id):
+        return None
+    return os.path.join(
+        settings.PROFILING_DIR,
+        profile_id + PROFILE_FILES[kind],
+    )
+
+
+def _profile_ids():
+    try:
+        names = os.listdir(settings.PROFILING_DIR)
+    except FileNotFoundError:
+        return []
+    suffix = PROFILE_FILES["sql"]
+    return sorted(
+        name[: -len(suffix)]
+        for name in names
+        if name.endswith(suffix) and PROFILE_ID_RE.match(name[: -len(suffix)])
+    )
+
+
+def save_profile(profile_id, profiler, info, queries):
+    """Store a profile and drop the oldest beyond PROFILING_MAX_PROFILES"""
+    os.makedirs(settings.PROFILING_DIR, exist_ok=True)
+    profiler.dump_stats(profile_path(profile_id, "profile"))
+
+    # Written last and renamed into place, as it makes a profile listed
+    path = profile_path(profile_id, "sql")
+    with open(f"{path}.tmp", "w") as f:
+        json.dump({"id": profile_id, **info, "queries": queries}, f, indent=2)
+    os.replace(f"{path}.tmp", path)
+
+    delete_profiles(_profile_ids()[: -settings.PROFILING_MAX_PROFILES])
+
+
+def delete_profiles(profile_ids):
+    for profile_id in profile_ids:
+        for kind in PROFILE_FILES:
+            try:
+                os.remove(profile_path(profile_id, kind))
+            except FileNotFoundError:
+                pass
+
+
+def list_profiles():
+    """Return the info of the stored profiles, newest first"""
+    profiles = []
+    for profile_id in reversed(_profile_ids()):
+        try:
+            with open(profile_path(profile_id, "sql")) as f:
+                info = json.load(f)
+        except FileNotFoundError:
+            # Deleted by another process since listing the directory
+            continue
+        del info["queries"]
+        profiles.append(info)
+    return profiles
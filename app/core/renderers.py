@@ -0,0 +1,46 @@
+"""
+JSON renderer for the REST API encoding with orjson
+"""
+
+import orjson
+
+from rest_framework.renderers import JSONRenderer
+
+# orjson handles dicts, lists, str, int, float, UUID and dataclasses
+# natively. Datetimes are passed through so they keep DRF's format
+# ("Z" for UTC) and every other type, such as Decimal, lazy strings or
+# querysets, falls back to the DRF encoder.
+OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+
+_encoder = JSONRenderer.encoder_class()
+
+
+def dumps(data, option=0):
+    """Return data encoded as JSON bytes, as DRF's JSONRenderer would"""
+    content = orjson.dumps(
+        data,
+        default=_encoder.default,
+        option=OPTIONS | option,
+    )
+    # Keep the output a strict JavaScript subset like DRF does
+    if b"\xe2\x80\xa8" in content or b"\xe2\x80\xa9" in content:
+        content = content.replace(b"\xe2\x80\xa8", b"\\u2028").replace(
+            b"\xe2\x80\xa9",
+            b"\\u2029",
+        )
+    return content
+
+
+class ORJSONRenderer(JSONRenderer):
+    """JSONRenderer encoding with orjson.
+
+    Output is compact UTF-8, like the default settings of JSONRenderer.
+    Any requested indent is rendered with two spaces.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+
+        indent = self.get_indent(accepted_media_type, renderer_context or {})
+        return dumps(data, orjson.OPT_INDENT_2 if indent else 0)
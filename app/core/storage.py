@@ -0,0 +1,63 @@
+"""
+File storage backends
+"""
+
+import hashlib
+import os
+
+from django.core.files.storage import FileSystemStorage
+from django.db import connection
+from django.utils.deconstruct import deconstructible
+
+
+def lock_key(name):
+    """Return the advisory lock key of a stored file name"""
+    digest = hashlib.sha256(name.encode()).digest()
+    return int.from_bytes(digest[:8], "big", signed=True)
+
+
+def lock_names(names):
+    """Lock stored file names until the current transaction ends.
+
+    Saving and deleting a shared file both lock its name, so a file is
+    not deleted while a transaction adding a reference to it runs.
+    Locks in key order, so concurrent callers do not deadlock.
+    """
+    keys = sorted({lock_key(name) for name in names})
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT pg_advisory_xact_lock(key) "
+            "FROM unnest(%s::bigint[]) AS key ORDER BY key",
+            [keys],
+        )
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """File system storage naming files by the SHA-256 of their content.
+
+    Identical uploads share one file, so saving a file that is already
+    stored only costs hashing it. Files can be referenced by many rows
+    and must only be deleted once nothing refers to them.
+
+    Saves lock the file name with lock_names(), so they must run in the
+    transaction storing the reference to the file.
+    """
+
+    def _save(self, name, content):
+        digest = hashlib.sha256()
+        for chunk in content.chunks():
+            digest.update(chunk)
+        digest = digest.hexdigest()
+        ext = os.path.splitext(name)[1].lower()
+        name = os.path.join(
+            os.path.dirname(name),
+            digest[:2],
+            f"{digest}{ext}",
+        )
+        lock_names([name])
+        if self.exists(name):
+            return name
+
+        content.seek(0)
+        return super()._save(name, content)
@@ -0,0 +1,85 @@
+"""
+Test helpers shared by the app test suites.
+"""
+
+import subprocess
+import sys
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from core.models import Recipe, Tag, Ingredient
+
+
+def run_in_other_process(code):
+    """Run Python code in a new process of the app and return its stdout.
+
+    For checking state shared between workers, such as the cache.
+    """
+    result = subprocess.run(
+        [sys.executable, "manage.py", "shell", "-c", code],
+        cwd=settings.BASE_DIR,
+        capture_output=True,
+        check=True,
+        text=True,
+    )
+    return result.stdout
+
+
+def create_recipe(user, tags=(), ingredients=(), **params):
+    """Create and return a sample recipe.
+
+    tags and ingredients are names of new tags and ingredients to add.
+    """
+    defaults = {
+        "title": "Sample recipe title",
+        "time_minutes": 22,
+        "price": Decimal("5.25"),
+        "description": "Sample description",
+        "link": "http://example.com/recipe.pdf",
+    }
+    defaults.update(params)
+
+    recipe = Recipe.objects.create(user=user, **defaults)
+    for name in tags:
+        recipe.tags.add(Tag.objects.create(user=user, name=name))
+    for name in ingredients:
+        recipe.ingredients.add(Ingredient.objects.create(user=user, name=name))
+    return recipe
+
+
+class QueryBudgetMixin:
+    """TestCase mixin for asserting on the queries an endpoint runs"""
+
+    def count_queries(self, func):
+        """Run func and return the number of queries it executed"""
+        with CaptureQueriesContext(connection) as context:
+            func()
+
+        return len(context.captured_queries)
+
+    def assertQueryBudget(self, func, grow, max_queries=None):
+        """Assert func runs the same number of queries after grow() is called.
+
+        grow should add rows to the result func returns, so a query count
+        that depends on the result size (N+1) fails the assertion.
+        """
+        before = self.count_queries(func)
+        grow()
+        after = self.count_queries(func)
+
+        self.assertEqual(
+            before,
+            after,
+            f"Query count grew from {before} to {after} with the result size",
+        )
+        if max_queries is not None:
+            self.assertLessEqual(
+                after,
+                max_queries,
+                f"{after} queries exceeds the budget of {max_queries}",
+            )
+
+        return after
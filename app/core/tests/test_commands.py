@@ -1,12 +1,21 @@
 """Test custom django management commands"""
 
+import json
+import os
+import tempfile
+from io import StringIO
 from unittest.mock import patch
 
 from psycopg2 import OperationalError as Psycopg2Error
 
+from django.contrib.auth import get_user_model
 from django.core.management import call_command
+from django.core.management.base import CommandError
 from django.db.utils import OperationalError
-from django.test import SimpleTestCase
+from django.test import SimpleTestCase, TestCase
+
+from core.models import Recipe, Tag, Ingredient
+from recipe.cache import get_version
 
 
 @patch("core.management.commands.wait_for_db.Command.check")
@@ -33,3 +42,225 @@ class CommandTests(SimpleTestCase):
         self.assertEqual(patched_check.call_count, 6)
 
         patched_check.assert_called_with(databases=["default"])
+
+
+class ImportRecipesCommandTests(TestCase):
+    """Test the import_recipes command"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            "user@example.com",
+            "testpass123",
+        )
+        self.other = get_user_model().objects.create_user(
+            "other@example.com",
+            "testpass123",
+        )
+
+    def _write(self, suffix, content):
+        """Write content to a temp file and return its path"""
+        fd, path = tempfile.mkstemp(suffix=suffix)
+        with os.fdopen(fd, "w") as f:
+            f.write(content)
+        self.addCleanup(os.remove, path)
+        return path
+
+    def _import(self, path, **options):
+        out = StringIO()
+        call_command("import_recipes", path, stdout=out, **options)
+        return out.getvalue()
+
+    def test_import_ndjson(self):
+        """Test importing NDJSON dedupes tags per user"""
+        existing = Tag.objects.create(user=self.user, name="Vegan")
+        records = [
+            {
+                "user": "user@example.com",
+                "title": "Soup",
+                "time_minutes": 20,
+                "price": "3.5",
+                "tags": ["Vegan", "Dinner", "Dinner"],
+                "ingredients": [{"name": "salt"}],
+            },
+            {
+                "user": "user@example.com",
+                "title": "Stew",
+                "description": "Slow cooked",
+                "time_minutes": 90,
+                "price": 7,
+                "tags": ["Dinner"],
+            },
+            {
+                "user": "other@example.com",
+                "title": "Other",
+                "time_minutes": 5,
+                "price": "1.00",
+                "tags": ["Dinner"],
+            },
+        ]
+        path = self._write(
+            ".ndjson",
+            "\n".join(json.dumps(record) for record in records),
+        )
+
+        out = self._import(path, batch_size=2)
+
+        self.assertIn("Imported 3 recipes, 2 tags and 1 ingredients", out)
+        self.assertIn("rows/sec", out)
+        soup = Recipe.objects.get(title="Soup")
+        self.assertEqual(soup.user, self.user)
+        self.assertEqual(soup.description, "")
+        self.assertEqual(str(soup.price), "3.50")
+        self.assertIn(existing, soup.tags.all())
+        self.assertEqual(soup.tags.count(), 2)
+        self.assertEqual(soup.ingredients.get().name, "salt")
+        stew = Recipe.objects.get(title="Stew")
+        self.assertEqual(
+            stew.tags.get(),
+            Tag.objects.get(user=self.user, name="Dinner"),
+        )
+        self.assertEqual(Tag.objects.filter(name="Dinner").count(), 2)
+
+    def test_import_csv(self):
+        """Test importing CSV with a default user"""
+        path = self._write(
+            ".csv",
+            "title,description,time_minutes,price,link,tags,ingredients\n"
+            'Pie,"Sweet, with apples",45,4.25,,Dessert|Baking,apple|flour\n',
+        )
+
+        self._import(path, user="user@example.com")
+
+        recipe = Recipe.objects.get(user=self.user)
+        self.assertEqual(recipe.description, "Sweet, with apples")
+        self.assertEqual(recipe.link, "")
+        self.assertEqual(recipe.tags.count(), 2)
+        self.assertEqual(
+            Ingredient.objects.filter(user=self.user).count(),
+            2,
+        )
+
+    def test_import_new_rows_get_sequence_ids(self):
+        """Test rows created after an import do not collide on ids"""
+        path = self._write(
+            ".ndjson",
+            json.dumps(
+                {
+                    "user": "user@example.com",
+                    "title": "Imported",
+                    "time_minutes": 1,
+                    "price": "1",
+                    "tags": ["a"],
+                }
+            ),
+        )
+        self._import(path)
+
+        recipe = Recipe.objects.create(
+            user=self.user,
+            title="New",
+            time_minutes=1,
+            price="1",
+        )
+        recipe.tags.add(Tag.objects.create(user=self.user, name="b"))
+
+        self.assertEqual(Recipe.objects.count(), 2)
+
+    def test_import_unknown_user(self):
+        """Test records for unknown users abort the import"""
+        path = self._write(
+            ".ndjson",
+            json.dumps(
+                {
+                    "user": "nobody@example.com",
+                    "title": "x",
+                    "time_minutes": 1,
+                    "price": "1",
+                }
+            ),
+        )
+
+        with self.assertRaises(CommandError):
+            self._import(path)
+
+    def test_import_invalid_record(self):
+        """Test an invalid record reports its line number"""
+        path = self._write(
+            ".ndjson",
+            json.dumps({"user": "user@example.com", "title": "x"}),
+        )
+
+        with self.assertRaisesMessage(CommandError, "Record 1"):
+            self._import(path)
+        self.assertFalse(Recipe.objects.exists())
+
+    def test_import_too_long_value(self):
+        """Test values longer than the model allows report their record"""
+        records = [
+            {
+                "user": "user@example.com",
+                "title": "Soup",
+                "time_minutes": 1,
+                "price": "1",
+            },
+            {
+                "user": "user@example.com",
+                "title": "Stew",
+                "time_minutes": 1,
+                "price": "1",
+                "tags": ["x" * 256],
+            },
+        ]
+        path = self._write(
+            ".ndjson",
+            "\n".join(json.dumps(record) for record in records),
+        )
+
+        with self.assertRaisesMessage(CommandError, "Record 2: tag name"):
+            self._import(path)
+        self.assertFalse(Recipe.objects.exists())
+
+    def test_import_price_out_of_range(self):
+        """Test prices that do not fit the column are rejected"""
+        path = self._write(
+            ".ndjson",
+            json.dumps(
+                {
+                    "user": "user@example.com",
+                    "title": "x",
+                    "time_minutes": 1,
+                    "price": "1000",
+                }
+            ),
+        )
+
+        with self.assertRaisesMessage(CommandError, "Record 1: recipe price"):
+            self._import(path)
+
+    def test_failed_import_bumps_imported_users(self):
+        """Test users of batches committed before a failure are invalidated"""
+        records = [
+            {
+                "user": "user@example.com",
+                "title": "Soup",
+                "time_minutes": 1,
+                "price": "1",
+            },
+            {
+                "user": "user@example.com",
+                "title": "x" * 256,
+                "time_minutes": 1,
+                "price": "1",
+            },
+        ]
+        path = self._write(
+            ".ndjson",
+            "\n".join(json.dumps(record) for record in records),
+        )
+        version = get_version(self.user.id)
+
+        with self.assertRaisesMessage(CommandError, "Record 2: recipe title"):
+            self._import(path, batch_size=1)
+
+        self.assertTrue(Recipe.objects.filter(title="Soup").exists())
+        self.assertGreater(get_version(self.user.id), version)
@@ -0,0 +1,146 @@
+"""Test the Prometheus metrics"""
+
+from asgiref.sync import async_to_sync
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from prometheus_client import REGISTRY
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core import metrics
+from core.middleware import MetricsMiddleware
+
+METRICS_URL = reverse("metrics")
+TAGS_URL = reverse("recipe:tag-list")
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+class MetricsMiddlewareTests(TestCase):
+    """Test the metrics recorded per request"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "user@example.com",
+            "testpass123",
+        )
+        self.client.force_authenticate(self.user)
+
+    def test_request_recorded(self):
+        """Test latency, status, size and queries are labelled by view"""
+        view = "recipe:tag-list"
+        before = {
+            "responses": sample(
+                "django_http_responses_total",
+                view=view,
+                method="GET",
+                status="200",
+            ),
+            "requests": sample(
+                "django_http_request_duration_seconds_count",
+                view=view,
+                method="GET",
+            ),
+            "bytes": sample("django_http_response_size_bytes_sum", view=view),
+            "queries": sample("django_http_request_db_queries_sum", view=view),
+        }
+
+        with CaptureQueriesContext(connection) as context:
+            res = self.client.get(TAGS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertGreater(len(context.captured_queries), 0)
+        self.assertEqual(
+            sample(
+                "django_http_responses_total",
+                view=view,
+                method="GET",
+                status="200",
+            ),
+            before["responses"] + 1,
+        )
+        self.assertEqual(
+            sample(
+                "django_http_request_duration_seconds_count",
+                view=view,
+                method="GET",
+            ),
+            before["requests"] + 1,
+        )
+        self.assertEqual(
+            sample("django_http_response_size_bytes_sum", view=view),
+            before["bytes"] + len(res.content),
+        )
+        self.assertEqual(
+            sample("django_http_request_db_queries_sum", view=view),
+            before["queries"] + len(context.captured_queries),
+        )
+
+    def test_unmatched_url(self):
+        """Test requests not resolving to a view share one label"""
+        labels = {
+            "view": metrics.UNMATCHED_VIEW,
+            "method": "GET",
+            "status": "404",
+        }
+        before = sample("django_http_responses_total", **labels)
+
+        self.client.get("/no-such-page/")
+
+        self.assertEqual(
+            sample("django_http_responses_total", **labels),
+            before + 1,
+        )
+
+    def test_async_middleware(self):
+        """Test the middleware records requests of async handlers"""
+
+        async def get_response(request):
+            return HttpResponse(b"ok")
+
+        middleware = MetricsMiddleware(get_response)
+        labels = {"view": metrics.UNMATCHED_VIEW, "method": "GET"}
+        before = sample("django_http_request_duration_seconds_count", **labels)
+
+        res = async_to_sync(middleware)(RequestFactory().get("/"))
+
+        self.assertEqual(res.content, b"ok")
+        self.assertEqual(
+            sample("django_http_request_duration_seconds_count", **labels),
+            before + 1,
+        )
+
+
+class MetricsViewTests(TestCase):
+    """Test the metrics endpoint"""
+
+    def test_metrics_text_format(self):
+        """Test the metrics are exposed in the Prometheus text format"""
+        self.client.get(METRICS_URL)
+
+        res = self.client.get(METRICS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res["Content-Type"].startswith("text/plain"))
+        self.assertIn(
+            b'django_http_responses_total{method="GET",status="200",'
+            b'view="metrics"}',
+            res.content,
+        )
+
+    @override_settings(METRICS_TOKEN="secret")
+    def test_metrics_token(self):
+        """Test a configured token is required to scrape"""
+        res = self.client.get(METRICS_URL)
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        res = self.client.get(METRICS_URL, HTTP_AUTHORIZATION="Bearer secret")
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
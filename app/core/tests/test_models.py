@@ -1,9 +1,14 @@
 """Test user model"""
 
+import threading
+import time
 from unittest.mock import patch
 from decimal import Decimal
 
-from django.test import TestCase
+import psycopg2
+
+from django.db import IntegrityError, connection, transaction
+from django.test import TestCase, TransactionTestCase
 from django.contrib.auth import get_user_model
 
 from core import models
@@ -78,6 +83,22 @@ class ModelTests(TestCase):
 
         self.assertEqual(nome_tag, tag.name)
 
+    def test_tag_name_unique_per_user(self):
+        """Test a user cannot have two tags with the same name"""
+        user = get_user_model().objects.create_user(
+            "test@example.com",
+            "testpass123",
+        )
+        other_user = get_user_model().objects.create_user(
+            "other@example.com",
+            "testpass123",
+        )
+        models.Tag.objects.create(user=user, name="Dinner")
+        models.Tag.objects.create(user=other_user, name="Dinner")
+
+        with self.assertRaises(IntegrityError):
+            models.Tag.objects.create(user=user, name="Dinner")
+
     def test_create_ingredient(self):
         """Test creating a tag is sucessful"""
         user = get_user_model().objects.create_user(
@@ -92,6 +113,46 @@ class ModelTests(TestCase):
 
         self.assertEqual(ingredient_name, ingredient.name)
 
+    def test_get_or_create_many(self):
+        """Test resolving names creates only the missing objects"""
+        user = get_user_model().objects.create_user(
+            "test@example.com",
+            "testpass123",
+        )
+        existing = models.Tag.objects.create(user=user, name="Vegan")
+
+        tags = models.Tag.objects.get_or_create_many(
+            user,
+            ["Dinner", "Vegan", "Dinner"],
+        )
+
+        self.assertEqual([tag.name for tag in tags], ["Dinner", "Vegan"])
+        self.assertEqual(tags[1], existing)
+        self.assertIsNotNone(tags[0].id)
+        self.assertEqual(models.Tag.objects.filter(user=user).count(), 2)
+
+    def test_get_or_create_many_queries(self):
+        """Test resolving names runs an insert and a select"""
+        user = get_user_model().objects.create_user(
+            "test@example.com",
+            "testpass123",
+        )
+        models.Ingredient.objects.create(user=user, name="Salt")
+        names = ["Salt", *(f"ingredient {i}" for i in range(10))]
+
+        with self.assertNumQueries(2):
+            ingredients = models.Ingredient.objects.get_or_create_many(
+                user,
+                names,
+            )
+
+        self.assertEqual([obj.name for obj in ingredients], names)
+        self.assertTrue(all(obj.user == user for obj in ingredients))
+        self.assertEqual(
+            models.Ingredient.objects.filter(user=user).count(),
+            len(names),
+        )
+
     @patch("core.models.uuid.uuid4")
     def test_recipe_file_name_uuid(self, mock_uuid):
         """Testgenerating image path"""
@@ -100,3 +161,69 @@ class ModelTests(TestCase):
         file_path = models.recipe_image_file_path(None, "example.jpg")
 
         self.assertEqual(file_path, f"uploads/recipe/{uuid}.jpg")
+
+
+class GetOrCreateManyConcurrencyTests(TransactionTestCase):
+    """Test concurrent transactions resolving the same names"""
+
+    def _wait_for_lock_waits(self, count):
+        """Wait until count connections wait for a lock"""
+        for _ in range(100):
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT count(*) FROM pg_stat_activity "
+                    "WHERE datname = current_database() "
+                    "AND wait_event_type = 'Lock'"
+                )
+                if cursor.fetchone()[0] >= count:
+                    return
+            time.sleep(0.05)
+        self.fail(f"{count} connections never waited for a lock")
+
+    def test_reversed_names_do_not_deadlock(self):
+        """Test overlapping names in opposite orders do not deadlock"""
+        user = get_user_model().objects.create_user(
+            "test@example.com",
+            "testpass123",
+        )
+        names = ["a", "m", "z"]
+        # Holds "m", so both transactions insert their first name and wait
+        gate = psycopg2.connect(**connection.get_connection_params())
+        self.addCleanup(gate.close)
+        with gate.cursor() as cursor:
+            cursor.execute(
+                "INSERT INTO core_tag (user_id, name) VALUES (%s, 'm')",
+                [user.id],
+            )
+        errors = []
+
+        def resolve(order):
+            try:
+                with transaction.atomic():
+                    models.Tag.objects.get_or_create_many(user, order)
+            except Exception as error:
+                errors.append(error)
+            finally:
+                connection.close()
+
+        threads = [
+            threading.Thread(target=resolve, args=(order,))
+            for order in [names, names[::-1]]
+        ]
+        for thread in threads:
+            thread.start()
+        self._wait_for_lock_waits(2)
+        gate.rollback()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(
+            sorted(
+                models.Tag.objects.filter(user=user).values_list(
+                    "name",
+                    flat=True,
+                )
+            ),
+            names,
+        )
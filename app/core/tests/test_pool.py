@@ -0,0 +1,146 @@
+"""Test the database connection pool"""
+
+import psycopg2
+
+from django.db import connection, connections
+from django.test import TestCase
+
+from core.db.pool import ConnectionPool
+
+
+class ConnectionPoolTests(TestCase):
+    """Test checking connections out of the pool"""
+
+    def _pool(self, **options):
+        pool = ConnectionPool(
+            **{
+                "max_size": 2,
+                "max_lifetime": 3600,
+                "timeout": 1,
+                "check_after": 30,
+                **options,
+            }
+        )
+        self.addCleanup(pool.close)
+        return pool
+
+    def _connect(self):
+        return psycopg2.connect(**connection.get_connection_params())
+
+    def test_connection_reused(self):
+        """Test a returned connection is handed out again"""
+        pool = self._pool()
+        raw = pool.get(self._connect)
+        pool.put(raw)
+
+        self.assertIs(pool.get(self._connect), raw)
+        pool.put(raw)
+
+    def test_pool_exhausted(self):
+        """Test checkouts beyond the max size time out"""
+        pool = self._pool(max_size=1, timeout=0.01)
+        raw = pool.get(self._connect)
+        self.addCleanup(raw.close)
+
+        with self.assertRaises(psycopg2.OperationalError):
+            pool.get(self._connect)
+
+    def test_max_lifetime(self):
+        """Test connections past their lifetime are replaced"""
+        pool = self._pool(max_lifetime=0)
+        raw = pool.get(self._connect)
+        pool.put(raw)
+
+        new = pool.get(self._connect)
+        pool.put(new)
+
+        self.assertIsNot(new, raw)
+        self.assertTrue(raw.closed)
+
+    def test_broken_connection_replaced(self):
+        """Test a connection dropped by the server is not handed out"""
+        pool = self._pool(check_after=0)
+        raw = pool.get(self._connect)
+        pool.put(raw)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT pg_terminate_backend(%s)",
+                [raw.get_backend_pid()],
+            )
+
+        new = pool.get(self._connect)
+
+        self.assertIsNot(new, raw)
+        with new.cursor() as cursor:
+            cursor.execute("SELECT 1")
+        pool.put(new)
+
+    def test_open_transaction_rolled_back(self):
+        """Test a connection is returned without an open transaction"""
+        pool = self._pool()
+        raw = pool.get(self._connect)
+        with raw.cursor() as cursor:
+            cursor.execute("CREATE TEMPORARY TABLE pool_test (id int)")
+        pool.put(raw)
+
+        raw = pool.get(self._connect)
+        with raw.cursor() as cursor:
+            cursor.execute("SELECT to_regclass('pool_test')")
+            self.assertIsNone(cursor.fetchone()[0])
+        pool.put(raw)
+
+    def test_session_state_reset(self):
+        """Test session settings and locks do not survive a checkout"""
+        pool = self._pool()
+        raw = pool.get(self._connect)
+        with raw.cursor() as cursor:
+            cursor.execute("SET statement_timeout = 1234")
+            cursor.execute("SELECT set_config('app.user_id', '42', false)")
+            cursor.execute("SELECT pg_advisory_lock(4242)")
+        raw.commit()
+        pool.put(raw)
+
+        raw = pool.get(self._connect)
+        with raw.cursor() as cursor:
+            cursor.execute("SHOW statement_timeout")
+            self.assertEqual(cursor.fetchone()[0], "0")
+            cursor.execute("SELECT current_setting('app.user_id', true)")
+            self.assertIn(cursor.fetchone()[0], (None, ""))
+            cursor.execute(
+                "SELECT count(*) FROM pg_locks "
+                "WHERE locktype = 'advisory' AND pid = pg_backend_pid()"
+            )
+            self.assertEqual(cursor.fetchone()[0], 0)
+        pool.put(raw)
+
+    def test_failed_reset_closes_connection(self):
+        """Test a connection that can not be reset is not reused"""
+        pool = self._pool()
+        raw = pool.get(self._connect)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT pg_terminate_backend(%s)",
+                [raw.get_backend_pid()],
+            )
+        pool.put(raw)
+
+        new = pool.get(self._connect)
+
+        self.assertIsNot(new, raw)
+        self.assertTrue(raw.closed)
+        pool.put(new)
+
+    def test_backend_returns_connections(self):
+        """Test closing a Django connection returns it to the pool"""
+        engine = connection.settings_dict["ENGINE"]
+        if engine != "core.db.backends.postgresql_pool":
+            self.skipTest("The pooled backend is not configured")
+        wrapper = connections.create_connection("default")
+        wrapper.ensure_connection()
+        raw = wrapper.connection
+        wrapper.close()
+
+        wrapper.ensure_connection()
+
+        self.assertIs(wrapper.connection, raw)
+        wrapper.close()
@@ -0,0 +1,190 @@
+"""Test the request profiling"""
+
+import json
+import os
+import pstats
+import tempfile
+from unittest.mock import patch
+
+from asgiref.sync import async_to_sync
+from django.contrib.auth import get_user_model
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from core import profiling
+from core.middleware import ProfilingMiddleware
+
+PROFILES_URL = reverse("profile-list")
+TAGS_URL = reverse("recipe:tag-list")
+
+
+def file_url(profile_id, kind):
+    return reverse("profile-file", args=[profile_id, kind])
+
+
+class ProfilingTests(TestCase):
+    """Test profiling requests and listing the profiles"""
+
+    def setUp(self):
+        self.profiles_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.profiles_dir.cleanup)
+        settings = override_settings(PROFILING_DIR=self.profiles_dir.name)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+        self.staff = get_user_model().objects.create_user(
+            "staff@example.com",
+            "testpass123",
+            is_staff=True,
+        )
+        self.user = get_user_model().objects.create_user(
+            "user@example.com",
+            "testpass123",
+        )
+        self.client = APIClient()
+
+    def _get_tags(self, user, **extra):
+        token, _ = Token.objects.get_or_create(user=user)
+        return self.client.get(
+            TAGS_URL,
+            HTTP_AUTHORIZATION=f"Token {token.key}",
+            **extra,
+        )
+
+    def test_staff_request_profiled(self):
+        """Test a staff request with the header stores its profile"""
+        res = self._get_tags(self.staff, HTTP_X_PROFILE="1")
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        profile_id = res["X-Profile-Id"]
+        stats = pstats.Stats(profiling.profile_path(profile_id, "profile"))
+        self.assertGreater(stats.total_calls, 0)
+        with open(profiling.profile_path(profile_id, "sql")) as f:
+            info = json.load(f)
+        self.assertEqual(info["view"], "recipe:tag-list")
+        self.assertEqual(info["status"], 200)
+        self.assertFalse(info["sampled"])
+        self.assertEqual(info["query_count"], len(info["queries"]))
+        self.assertTrue(
+            any("core_tag" in query["sql"] for query in info["queries"]),
+        )
+
+    @override_settings(PROFILING_SAMPLE_RATE=1)
+    def test_sql_log_without_params(self):
+        """Test the SQL log leaves out parameter values like token keys"""
+        token = Token.objects.create(user=self.user)
+
+        res = self._get_tags(self.user)
+
+        path = profiling.profile_path(res["X-Profile-Id"], "sql")
+        with open(path) as f:
+            content = f.read()
+        self.assertNotIn(token.key, content)
+        token_queries = [
+            query
+            for query in json.loads(content)["queries"]
+            if "authtoken_token" in query["sql"]
+        ]
+        self.assertEqual(token_queries[0]["param_count"], 1)
+
+    def test_header_ignored_for_non_staff(self):
+        """Test other users can not profile their requests"""
+        res = self._get_tags(self.user, HTTP_X_PROFILE="1")
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotIn("X-Profile-Id", res)
+        self.assertEqual(profiling.list_profiles(), [])
+
+    def test_sampled_requests_profiled(self):
+        """Test the sample rate profiles requests without the header"""
+        with override_settings(PROFILING_SAMPLE_RATE=0):
+            res = self._get_tags(self.user)
+        self.assertNotIn("X-Profile-Id", res)
+
+        with override_settings(PROFILING_SAMPLE_RATE=1):
+            res = self._get_tags(self.user)
+        self.assertIn("X-Profile-Id", res)
+        self.assertTrue(profiling.list_profiles()[0]["sampled"])
+
+    @override_settings(PROFILING_MAX_PROFILES=2)
+    def test_oldest_profiles_deleted(self):
+        """Test only the newest profiles are kept"""
+        ids = [
+            "20240101T000000-" + f"{i:032x}" for i in range(3)
+        ]
+        with patch("core.profiling.new_profile_id", side_effect=ids):
+            for _ in ids:
+                self._get_tags(self.staff, HTTP_X_PROFILE="1")
+
+        self.assertEqual(
+            [info["id"] for info in profiling.list_profiles()],
+            [ids[2], ids[1]],
+        )
+        self.assertFalse(
+            os.path.exists(profiling.profile_path(ids[0], "profile")),
+        )
+
+    def test_list_and_download(self):
+        """Test staff users list and download the profiles"""
+        profile_id = self._get_tags(self.staff, HTTP_X_PROFILE="1")[
+            "X-Profile-Id"
+        ]
+        self.client.force_authenticate(self.staff)
+
+        res = self.client.get(PROFILES_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data[0]["id"], profile_id)
+        self.assertNotIn("queries", res.data[0])
+        self.assertTrue(
+            res.data[0]["files"]["sql"].endswith(file_url(profile_id, "sql")),
+        )
+
+        res = self.client.get(file_url(profile_id, "sql"))
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIn("attachment", res["Content-Disposition"])
+        content = json.loads(b"".join(res.streaming_content))
+        self.assertEqual(content["id"], profile_id)
+
+    def test_download_not_found(self):
+        """Test unknown and malformed profile ids are not found"""
+        self.client.force_authenticate(self.staff)
+        for profile_id, kind in [
+            ("20240101T000000-" + "0" * 32, "profile"),
+            ("..", "sql"),
+            ("20240101T000000-" + "0" * 32, "other"),
+        ]:
+            with self.subTest(profile_id=profile_id, kind=kind):
+                res = self.client.get(file_url(profile_id, kind))
+                self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_listing_staff_only(self):
+        """Test the profiles are not visible to other users"""
+        res = self.client.get(PROFILES_URL)
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        self.client.force_authenticate(self.user)
+        res = self.client.get(PROFILES_URL)
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+    @override_settings(PROFILING_SAMPLE_RATE=1)
+    def test_async_middleware(self):
+        """Test requests of async handlers are profiled"""
+
+        async def get_response(request):
+            return HttpResponse(b"ok")
+
+        middleware = ProfilingMiddleware(get_response)
+
+        res = async_to_sync(middleware)(RequestFactory().get("/"))
+
+        self.assertEqual(res.content, b"ok")
+        self.assertEqual(
+            profiling.list_profiles()[0]["id"],
+            res["X-Profile-Id"],
+        )
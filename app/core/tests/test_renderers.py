@@ -0,0 +1,97 @@
+"""Test the orjson renderer and parser"""
+
+import datetime
+import io
+import json
+import uuid
+from collections import OrderedDict
+from decimal import Decimal
+
+from django.test import SimpleTestCase
+from django.utils.translation import gettext_lazy
+
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from core.parsers import ORJSONParser
+from core.renderers import ORJSONRenderer
+
+SAMPLE = OrderedDict(
+    [
+        ("id", 1),
+        ("price", Decimal("5.25")),
+        ("uuid", uuid.UUID("12345678-1234-5678-1234-567812345678")),
+        (
+            "created",
+            datetime.datetime(
+                2024, 1, 2, 3, 4, 5, 678901, tzinfo=datetime.timezone.utc,
+            ),
+        ),
+        ("naive", datetime.datetime(2024, 1, 2, 3, 4, 5)),
+        ("date", datetime.date(2024, 1, 2)),
+        ("time", datetime.time(3, 4, 5, 600)),
+        ("lazy", gettext_lazy("This field is required.")),
+        ("text", "Crème brûlée \u2028 \u2029 \"quoted\""),
+        ("nested", [{"id": 2, "name": None, "flag": True}]),
+        ("counts", {1: "one"}),
+        ("float", 0.1),
+    ]
+)
+
+
+class ORJSONRendererTests(SimpleTestCase):
+    """Test rendering JSON with orjson"""
+
+    def test_matches_json_renderer(self):
+        """Test the output is byte identical to DRF's JSONRenderer"""
+        self.assertEqual(
+            ORJSONRenderer().render(SAMPLE),
+            JSONRenderer().render(SAMPLE),
+        )
+
+    def test_render_none(self):
+        """Test no data renders an empty body"""
+        self.assertEqual(ORJSONRenderer().render(None), b"")
+
+    def test_render_indent(self):
+        """Test a requested indent pretty prints the same data"""
+        content = ORJSONRenderer().render(
+            {"id": 1, "tags": []},
+            "application/json; indent=4",
+        )
+
+        self.assertIn(b"\n  ", content)
+        self.assertEqual(json.loads(content), {"id": 1, "tags": []})
+
+
+class ORJSONParserTests(SimpleTestCase):
+    """Test parsing JSON with orjson"""
+
+    def _parse(self, content, encoding="utf-8"):
+        return ORJSONParser().parse(
+            io.BytesIO(content),
+            parser_context={"encoding": encoding},
+        )
+
+    def test_matches_json_parser(self):
+        """Test parsed data matches DRF's JSONParser"""
+        content = JSONRenderer().render(SAMPLE)
+
+        self.assertEqual(
+            self._parse(content),
+            JSONParser().parse(io.BytesIO(content)),
+        )
+
+    def test_parse_other_encoding(self):
+        """Test bodies in another declared charset are decoded"""
+        content = '{"name": "Crème"}'.encode("latin-1")
+
+        self.assertEqual(self._parse(content, "latin-1"), {"name": "Crème"})
+
+    def test_parse_error(self):
+        """Test invalid JSON raises a parse error"""
+        for content in [b"{", b'{"price": NaN}', b"\xff"]:
+            with self.subTest(content=content):
+                with self.assertRaises(ParseError):
+                    self._parse(content)
@@ -0,0 +1,65 @@
+"""Test file storage backends"""
+
+import hashlib
+import os
+import tempfile
+
+import psycopg2
+
+from django.core.files.base import ContentFile
+from django.db import connection
+from django.test import TestCase
+
+from core.storage import ContentAddressedStorage, lock_key
+
+
+def locked_elsewhere(name):
+    """Return whether the lock of name is held by another transaction"""
+    other = psycopg2.connect(**connection.get_connection_params())
+    try:
+        with other.cursor() as cursor:
+            cursor.execute(
+                "SELECT pg_try_advisory_xact_lock(%s)",
+                [lock_key(name)],
+            )
+            return not cursor.fetchone()[0]
+    finally:
+        other.close()
+
+
+class ContentAddressedStorageTests(TestCase):
+    """Test the content addressed storage"""
+
+    def setUp(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.storage = ContentAddressedStorage(location=tmp_dir.name)
+
+    def test_name_from_content_hash(self):
+        """Test files are named by the hash of their content"""
+        digest = hashlib.sha256(b"image").hexdigest()
+
+        name = self.storage.save("uploads/recipe/a.JPG", ContentFile(b"image"))
+
+        self.assertEqual(name, f"uploads/recipe/{digest[:2]}/{digest}.jpg")
+        with self.storage.open(name) as f:
+            self.assertEqual(f.read(), b"image")
+
+    def test_identical_content_shared(self):
+        """Test identical uploads share a single file"""
+        first = self.storage.save("uploads/a.jpg", ContentFile(b"same"))
+        second = self.storage.save("uploads/b.jpg", ContentFile(b"same"))
+        other = self.storage.save("uploads/c.jpg", ContentFile(b"other"))
+
+        self.assertEqual(first, second)
+        self.assertNotEqual(first, other)
+        self.assertEqual(
+            len(os.listdir(os.path.dirname(self.storage.path(first)))),
+            1,
+        )
+
+    def test_save_locks_name(self):
+        """Test a saved name stays locked until the transaction ends"""
+        name = self.storage.save("uploads/a.jpg", ContentFile(b"lock"))
+
+        self.assertTrue(locked_elsewhere(name))
@@ -0,0 +1,53 @@
+"""Test the shared test helpers"""
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+
+from core.models import Tag
+from core.testing import QueryBudgetMixin
+
+
+class QueryBudgetMixinTests(QueryBudgetMixin, TestCase):
+    """Test the query budget assertion"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            "test@example.com",
+            "testpass123",
+        )
+
+    def _add_tag(self):
+        Tag.objects.create(
+            user=self.user,
+            name=f"tag {Tag.objects.count()}",
+        )
+
+    def test_constant_queries_pass(self):
+        """Test a constant query count passes the budget"""
+        count = self.assertQueryBudget(
+            lambda: list(Tag.objects.filter(user=self.user)),
+            self._add_tag,
+            max_queries=1,
+        )
+
+        self.assertEqual(count, 1)
+
+    def test_growing_queries_fail(self):
+        """Test a query count growing with the result size fails"""
+
+        def n_plus_one():
+            for tag in Tag.objects.filter(user=self.user):
+                tag.user.email
+
+        self._add_tag()
+        with self.assertRaises(AssertionError):
+            self.assertQueryBudget(n_plus_one, self._add_tag)
+
+    def test_over_budget_fails(self):
+        """Test exceeding max_queries fails the budget"""
+        with self.assertRaises(AssertionError):
+            self.assertQueryBudget(
+                lambda: list(Tag.objects.filter(user=self.user)),
+                self._add_tag,
+                max_queries=0,
+            )
@@ -0,0 +1,28 @@
+"""
+File upload handlers
+"""
+
+from django.conf import settings
+from django.core.files.uploadhandler import (
+    SkipFile,
+    TemporaryFileUploadHandler,
+)
+
+
+class MaxSizeTemporaryFileUploadHandler(TemporaryFileUploadHandler):
+    """Stream uploads to a temp file and drop those over MAX_UPLOAD_SIZE.
+
+    A file is skipped as soon as it grows past the limit, so oversized
+    uploads never fill the disk and reach the view as a missing file.
+    """
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.received = 0
+
+    def receive_data_chunk(self, raw_data, start):
+        self.received += len(raw_data)
+        if self.received > settings.MAX_UPLOAD_SIZE:
+            self.file.close()
+            raise SkipFile()
+        return super().receive_data_chunk(raw_data, start)
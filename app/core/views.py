@@ -0,0 +1,56 @@
+"""
+Views for the request profiles
+"""
+
+from django.http import FileResponse, Http404
+from drf_spectacular.utils import extend_schema
+from rest_framework.authentication import SessionAuthentication
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from rest_framework.reverse import reverse
+from rest_framework.views import APIView
+
+from core import profiling
+from user.authentication import CachedTokenAuthentication
+
+
+class ProfileAPIView(APIView):
+    """Base view of the staff only profile endpoints"""
+
+    authentication_classes = [
+        CachedTokenAuthentication,
+        SessionAuthentication,
+    ]
+    permission_classes = [IsAdminUser]
+
+
+@extend_schema(exclude=True)
+class ProfileListView(ProfileAPIView):
+    """List the stored request profiles, newest first"""
+
+    def get(self, request):
+        profiles = profiling.list_profiles()
+        for info in profiles:
+            info["files"] = {
+                kind: reverse(
+                    "profile-file",
+                    args=[info["id"], kind],
+                    request=request,
+                )
+                for kind in profiling.PROFILE_FILES
+            }
+        return Response(profiles)
+
+
+@extend_schema(exclude=True)
+class ProfileFileView(ProfileAPIView):
+    """Download the cProfile dump or the SQL log of a profile"""
+
+    def get(self, request, profile_id, kind):
+        path = profiling.profile_path(profile_id, kind)
+        if path is None:
+            raise Http404
+        try:
+            return FileResponse(open(path, "rb"), as_attachment=True)
+        except FileNotFoundError:
+            raise Http404
@@ -0,0 +1,126 @@
+"""
+Async list and retrieve for the recipe API viewsets
+"""
+
+import functools
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import Http404
+
+from rest_framework.response import Response
+
+# Viewset actions with an async implementation, a<action> on the viewset
+ASYNC_ACTIONS = ("list", "retrieve")
+
+
+def async_read_view(view):
+    """Return an async view serving the async actions of a viewset view.
+
+    Other actions keep running the sync view in a thread. Authentication,
+    permissions and throttling stay sync too, only the queries and
+    serialization of the response run on the event loop.
+    """
+    cls = view.cls
+    initkwargs = view.initkwargs
+    actions = dict(view.actions)
+    if "get" in actions and "head" not in actions:
+        actions["head"] = actions["get"]
+    sync_view = sync_to_async(view)
+
+    @functools.wraps(view)
+    async def async_view(request, *args, **kwargs):
+        action = actions.get(request.method.lower())
+        if action not in ASYNC_ACTIONS:
+            return await sync_view(request, *args, **kwargs)
+
+        self = cls(**initkwargs)
+        self.action_map = actions
+        for method, name in actions.items():
+            setattr(self, method, getattr(self, name))
+        self.args = args
+        self.kwargs = kwargs
+
+        # APIView.dispatch with the handler awaited
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+        try:
+            await sync_to_async(self.initial)(request, *args, **kwargs)
+            handler = getattr(self, f"a{action}")
+            response = await handler(request, *args, **kwargs)
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(
+            request,
+            response,
+            *args,
+            **kwargs,
+        )
+        return self.response
+
+    return async_view
+
+
+class AsyncReadMixin:
+    """Async list and retrieve actions using the async ORM.
+
+    Served by the views of as_async_view(), and by as_view() when
+    RECIPE_ASYNC_VIEWS is set for ASGI deployments.
+    """
+
+    @classmethod
+    def as_view(cls, actions=None, **initkwargs):
+        if settings.RECIPE_ASYNC_VIEWS:
+            return cls.as_async_view(actions, **initkwargs)
+        return super().as_view(actions, **initkwargs)
+
+    @classmethod
+    def as_async_view(cls, actions=None, **initkwargs):
+        """Return the view with the async actions awaited"""
+        return async_read_view(super().as_view(actions, **initkwargs))
+
+    async def apaginate_queryset(self, queryset):
+        """Async paginate_queryset"""
+        if self.paginator is None:
+            return None
+        return await self.paginator.apaginate_queryset(
+            queryset,
+            self.request,
+            view=self,
+        )
+
+    async def aget_object(self):
+        """Async get_object"""
+        queryset = self.filter_queryset(self.get_queryset())
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        filter_kwargs = {self.lookup_field: self.kwargs[lookup_url_kwarg]}
+        try:
+            obj = await queryset.aget(**filter_kwargs)
+        except (TypeError, ValueError, queryset.model.DoesNotExist):
+            raise Http404(
+                "No %s matches the given query."
+                % queryset.model._meta.object_name
+            )
+        self.check_object_permissions(self.request, obj)
+        return obj
+
+    async def alist(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+
+        page = await self.apaginate_queryset(queryset)
+        if page is not None:
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+
+        serializer = self.get_serializer(
+            [obj async for obj in queryset],
+            many=True,
+        )
+        return Response(serializer.data)
+
+    async def aretrieve(self, request, *args, **kwargs):
+        instance = await self.aget_object()
+        serializer = self.get_serializer(instance)
+        return Response(serializer.data)
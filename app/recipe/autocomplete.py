@@ -0,0 +1,52 @@
+"""
+Prefix and fuzzy autocomplete of tag and ingredient names
+"""
+
+from django.contrib.postgres.search import TrigramSimilarity
+from django.db import connections
+from django.db.models import Case, IntegerField, Q, Value, When
+from django.db.models.functions import Upper
+
+_trigram_enabled = {}
+
+
+def trigram_enabled(using="default"):
+    """Return whether the pg_trgm extension is installed in the database"""
+    connection = connections[using]
+    key = (connection.alias, connection.settings_dict["NAME"])
+    if key not in _trigram_enabled:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT EXISTS "
+                "(SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm')"
+            )
+            _trigram_enabled[key] = cursor.fetchone()[0]
+    return _trigram_enabled[key]
+
+
+def autocomplete(queryset, term, limit):
+    """Return up to limit objects of queryset whose name matches term.
+
+    Names starting with term are listed first. When pg_trgm is
+    installed, names similar to term are matched too, so typos still
+    find a result. Both lookups compare UPPER(name) to use the indexes.
+    """
+    term = term.strip().upper()
+    queryset = queryset.annotate(upper_name=Upper("name"))
+    prefix = Q(upper_name__startswith=term)
+    ordering = [
+        Case(
+            When(prefix, then=Value(0)),
+            default=Value(1),
+            output_field=IntegerField(),
+        ),
+    ]
+    if trigram_enabled(queryset.db):
+        queryset = queryset.filter(
+            prefix | Q(upper_name__trigram_similar=term),
+        ).annotate(similarity=TrigramSimilarity("upper_name", term))
+        ordering.append("-similarity")
+    else:
+        queryset = queryset.filter(prefix)
+
+    return queryset.order_by(*ordering, "upper_name", "id")[:limit]
@@ -0,0 +1,265 @@
+"""
+Benchmarks for the recipe API run against a seeded dataset.
+"""
+
+import io
+import random
+import time
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Exists, OuterRef
+
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from core.models import Recipe, Tag, Ingredient
+from core.parsers import ORJSONParser
+from core.renderers import ORJSONRenderer
+from recipe.rows import row_columns, row_fields, serialize_rows
+from recipe.serializers import RecipeSerializer
+
+
+def seed(user, recipes, tags, ingredients, per_recipe, seed=0):
+    """Bulk create recipes for user with randomly assigned tags/ingredients"""
+    rng = random.Random(seed)
+    tag_objs = Tag.objects.bulk_create(
+        Tag(user=user, name=f"tag {i}") for i in range(tags)
+    )
+    ingredient_objs = Ingredient.objects.bulk_create(
+        Ingredient(user=user, name=f"ingredient {i}")
+        for i in range(ingredients)
+    )
+    recipe_objs = Recipe.objects.bulk_create(
+        Recipe(
+            user=user,
+            title=f"recipe {i}",
+            description=f"description for recipe {i}",
+            time_minutes=rng.randint(5, 120),
+            price=Decimal(rng.randint(100, 9999)) / 100,
+        )
+        for i in range(recipes)
+    )
+
+    TagThrough = Recipe.tags.through
+    IngredientThrough = Recipe.ingredients.through
+    tag_rows = []
+    ingredient_rows = []
+    for recipe in recipe_objs:
+        for tag in rng.sample(tag_objs, min(per_recipe, tags)):
+            tag_rows.append(TagThrough(recipe_id=recipe.id, tag_id=tag.id))
+        for ingredient in rng.sample(
+            ingredient_objs,
+            min(per_recipe, ingredients),
+        ):
+            ingredient_rows.append(
+                IngredientThrough(
+                    recipe_id=recipe.id,
+                    ingredient_id=ingredient.id,
+                )
+            )
+    TagThrough.objects.bulk_create(tag_rows, batch_size=5000)
+    IngredientThrough.objects.bulk_create(ingredient_rows, batch_size=5000)
+
+    with connection.cursor() as cursor:
+        cursor.execute("ANALYZE")
+
+    return recipe_objs, tag_objs, ingredient_objs
+
+
+def explain(stdout, title, queryset):
+    """Write the EXPLAIN ANALYZE plan and wall time of queryset"""
+    start = time.perf_counter()
+    list(queryset)
+    elapsed = (time.perf_counter() - start) * 1000
+
+    stdout.write(f"== {title} ({elapsed:.1f} ms)")
+    stdout.write(queryset.explain(analyze=True))
+    stdout.write("")
+
+
+def recipe_filters(stdout, user, data):
+    """Compare JOIN + DISTINCT filtering with EXISTS semi-joins"""
+    recipes, tags, ingredients = data
+    tag_ids = [tag.id for tag in tags[:3]]
+    ing_ids = [ingredient.id for ingredient in ingredients[:3]]
+    base = Recipe.objects.filter(user=user).order_by("-id")
+
+    explain(
+        stdout,
+        "recipes: JOIN + DISTINCT",
+        base.filter(tags__id__in=tag_ids)
+        .filter(ingredients__id__in=ing_ids)
+        .distinct(),
+    )
+    explain(
+        stdout,
+        "recipes: EXISTS",
+        base.filter(
+            Exists(
+                Recipe.tags.through.objects.filter(
+                    recipe_id=OuterRef("pk"),
+                    tag_id__in=tag_ids,
+                )
+            )
+        ).filter(
+            Exists(
+                Recipe.ingredients.through.objects.filter(
+                    recipe_id=OuterRef("pk"),
+                    ingredient_id__in=ing_ids,
+                )
+            )
+        ),
+    )
+
+    tag_base = Tag.objects.filter(user=user).order_by("-name")
+    explain(
+        stdout,
+        "assigned tags: JOIN + DISTINCT",
+        tag_base.filter(recipe__isnull=False).distinct(),
+    )
+    explain(
+        stdout,
+        "assigned tags: EXISTS",
+        tag_base.filter(
+            Exists(Recipe.tags.through.objects.filter(tag_id=OuterRef("pk")))
+        ),
+    )
+
+
+def _meta_by_name(items, name):
+    return next(item for item in items if item.name == name)
+
+
+def list_indexes(stdout, user, data):
+    """Compare the list queries with and without the composite indexes.
+
+    Dropping the indexes takes ACCESS EXCLUSIVE locks on the recipe, tag
+    and ingredient tables, held until the benchmark rolls back.
+    """
+    page_size = settings.API_PAGE_SIZE
+    queries = {
+        "recipes by -id": Recipe.objects.filter(user=user).order_by("-id"),
+        "tags by -name": Tag.objects.filter(user=user).order_by("-name"),
+        "ingredients by -name": Ingredient.objects.filter(
+            user=user,
+        ).order_by("-name"),
+    }
+    for title, queryset in queries.items():
+        explain(stdout, f"{title}: indexed", queryset[:page_size])
+
+    # Fire the deferred FK checks of the seed so the tables can be altered
+    with connection.cursor() as cursor:
+        cursor.execute("SET CONSTRAINTS ALL IMMEDIATE")
+    with connection.schema_editor() as editor:
+        editor.remove_index(
+            Recipe,
+            _meta_by_name(Recipe._meta.indexes, "core_recipe_user_recent"),
+        )
+        for model in [Tag, Ingredient]:
+            editor.remove_constraint(
+                model,
+                _meta_by_name(
+                    model._meta.constraints,
+                    f"core_{model._meta.model_name}_user_name_unique",
+                ),
+            )
+    with connection.cursor() as cursor:
+        cursor.execute("ANALYZE")
+
+    for title, queryset in queries.items():
+        explain(stdout, f"{title}: unindexed", queryset[:page_size])
+
+
+def _timed(func, repeat=3):
+    """Return the result and best wall time in seconds of func()"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return result, best
+
+
+def list_serialization(stdout, user, data):
+    """Compare RecipeSerializer with the values() row list path"""
+    recipes = data[0]
+    queryset = Recipe.objects.filter(user=user).order_by("-id")
+    serializer = RecipeSerializer()
+    fields = row_fields(serializer)
+    renderer = JSONRenderer()
+
+    def serialize():
+        return RecipeSerializer(
+            queryset.prefetch_related("tags", "ingredients"),
+            many=True,
+        ).data
+
+    def rows():
+        return serialize_rows(
+            serializer,
+            fields,
+            list(queryset.values(*row_columns(Recipe, fields))),
+        )
+
+    expected, serializer_time = _timed(serialize)
+    result, rows_time = _timed(rows)
+    for item in expected:
+        for name in ["tags", "ingredients"]:
+            item[name] = sorted(item[name], key=lambda obj: obj["id"])
+
+    per_row = 1_000_000 / len(recipes)
+    stdout.write(
+        f"== RecipeSerializer: {serializer_time * 1000:.1f} ms "
+        f"({serializer_time * per_row:.1f} us/row)"
+    )
+    stdout.write(
+        f"== values() rows: {rows_time * 1000:.1f} ms "
+        f"({rows_time * per_row:.1f} us/row)"
+    )
+    stdout.write(f"speedup: {serializer_time / rows_time:.1f}x")
+    stdout.write(
+        "identical JSON: "
+        f"{renderer.render(expected) == renderer.render(result)}"
+    )
+
+
+def json_rendering(stdout, user, data):
+    """Compare DRF's stdlib JSON renderer and parser with orjson"""
+    serializer = RecipeSerializer()
+    fields = row_fields(serializer)
+    queryset = Recipe.objects.filter(user=user).order_by("-id")
+    payload = {
+        "next": None,
+        "previous": None,
+        "results": serialize_rows(
+            serializer,
+            fields,
+            list(queryset.values(*row_columns(Recipe, fields))),
+        ),
+    }
+
+    for renderer, parser in [
+        (JSONRenderer(), JSONParser()),
+        (ORJSONRenderer(), ORJSONParser()),
+    ]:
+        content, render_time = _timed(lambda: renderer.render(payload))
+        _, parse_time = _timed(lambda: parser.parse(io.BytesIO(content)))
+        stdout.write(
+            f"== {type(renderer).__name__}: render "
+            f"{render_time * 1000:.1f} ms, {type(parser).__name__}: parse "
+            f"{parse_time * 1000:.1f} ms ({len(content) / 1e6:.1f} MB)"
+        )
+
+
+SCENARIOS = {
+    "json_rendering": json_rendering,
+    "list_indexes": list_indexes,
+    "list_serialization": list_serialization,
+    "recipe_filters": recipe_filters,
+}
+
+# Scenarios blocking all queries on the tables they alter while they run
+LOCKING_SCENARIOS = {"list_indexes"}
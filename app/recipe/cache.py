@@ -0,0 +1,180 @@
+"""
+Per-user versioned response cache for the recipe API
+"""
+
+import asyncio
+import functools
+import hashlib
+import time
+from urllib.parse import urlencode
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.http import parse_etags, quote_etag
+
+from rest_framework import status
+from rest_framework.response import Response
+
+from core.cache import is_shared_cache
+
+
+def version_key(user_id):
+    return f"recipe:version:{user_id}"
+
+
+def get_version(user_id):
+    """Return the current recipe data version of a user"""
+    key = version_key(user_id)
+    version = cache.get(key)
+    if version is None:
+        # Start from the clock so an evicted version is never reused
+        cache.add(key, time.time_ns(), None)
+        version = cache.get(key)
+
+    return version
+
+
+def _incr_version(user_id):
+    try:
+        cache.incr(version_key(user_id))
+    except ValueError:
+        cache.set(version_key(user_id), time.time_ns(), None)
+
+
+def bump_version(user_id):
+    """Invalidate every cached response of a user.
+
+    The version is bumped right away so the writer never reads its own
+    stale data, and within a transaction again on commit so concurrent
+    readers can not cache data from before the write under the new
+    version. Outside of one no database connection is opened, so it can
+    be called from threads that do not query.
+    """
+    _incr_version(user_id)
+    if transaction.get_connection().in_atomic_block:
+        transaction.on_commit(lambda: _incr_version(user_id))
+
+
+def response_cache_key(request, *parts):
+    """Return the cache key of a response for the current data version"""
+    user_id = request.user.pk
+    # Encoded so free text search terms stay valid in memcached keys
+    params = urlencode(sorted(request.query_params.lists()), doseq=True)
+    return ":".join(
+        [
+            "recipe:response",
+            str(user_id),
+            str(get_version(user_id)),
+            *map(str, parts),
+            f"{request.scheme}://{request.get_host()}",
+            request.accepted_renderer.format,
+            params,
+        ]
+    )
+
+
+def response_etag(view, request, kwargs):
+    """Return the strong ETag of a view response for the data version"""
+    key = response_cache_key(
+        request,
+        view.basename,
+        view.action,
+        *kwargs.values(),
+    )
+    return quote_etag(hashlib.sha1(key.encode()).hexdigest())
+
+
+def not_modified(request, etag):
+    """Return a 304 response if the request's If-None-Match matches etag"""
+    if_none_match = request.META.get("HTTP_IF_NONE_MATCH")
+    if if_none_match and etag in parse_etags(if_none_match):
+        return Response(
+            status=status.HTTP_304_NOT_MODIFIED,
+            headers={"ETag": etag},
+        )
+    return None
+
+
+def conditional_get(method):
+    """Add a strong ETag to a view method and answer 304 when it matches.
+
+    The ETag is derived from the user's data version and the request,
+    so a matching If-None-Match returns before any query or
+    serialization runs. Works on sync and async view methods. Skipped
+    with a process local cache, where other workers miss version bumps.
+    """
+    if asyncio.iscoroutinefunction(method):
+
+        @functools.wraps(method)
+        async def async_wrapper(self, request, *args, **kwargs):
+            if not is_shared_cache():
+                return await method(self, request, *args, **kwargs)
+            etag = await sync_to_async(response_etag)(self, request, kwargs)
+            response = not_modified(request, etag)
+            if response is not None:
+                return response
+
+            response = await method(self, request, *args, **kwargs)
+            if response.status_code == status.HTTP_200_OK:
+                response["ETag"] = etag
+            return response
+
+        return async_wrapper
+
+    @functools.wraps(method)
+    def wrapper(self, request, *args, **kwargs):
+        if not is_shared_cache():
+            return method(self, request, *args, **kwargs)
+        etag = response_etag(self, request, kwargs)
+        response = not_modified(request, etag)
+        if response is not None:
+            return response
+
+        response = method(self, request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            response["ETag"] = etag
+        return response
+
+    return wrapper
+
+
+class CachedListMixin:
+    """Cache list responses per user until their recipe data changes.
+
+    Disabled with a process local cache backend, where a write would
+    only invalidate the responses cached by the worker serving it.
+    """
+
+    def list(self, request, *args, **kwargs):
+        if not is_shared_cache():
+            return super().list(request, *args, **kwargs)
+        key = response_cache_key(request, self.basename, "list")
+        data = cache.get(key)
+        if data is not None:
+            return Response(data)
+
+        response = super().list(request, *args, **kwargs)
+        cache.set(key, response.data, settings.RECIPE_RESPONSE_CACHE_TTL)
+        return response
+
+    async def alist(self, request, *args, **kwargs):
+        if not is_shared_cache():
+            return await super().alist(request, *args, **kwargs)
+        key = await sync_to_async(response_cache_key)(
+            request,
+            self.basename,
+            "list",
+        )
+        data = await cache.aget(key)
+        if data is not None:
+            return Response(data)
+
+        response = await super().alist(request, *args, **kwargs)
+        await cache.aset(
+            key,
+            response.data,
+            settings.RECIPE_RESPONSE_CACHE_TTL,
+        )
+        return response
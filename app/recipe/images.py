@@ -0,0 +1,241 @@
+"""
+Resized variants of recipe images generated in a process pool
+"""
+
+import contextlib
+import contextvars
+import functools
+import logging
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+from PIL import Image
+
+from django.conf import settings
+from django.core.files import File
+from django.db import transaction
+from django.utils.translation import gettext_lazy as _
+
+from rest_framework import serializers
+
+from core.models import Recipe
+from core.storage import lock_names
+from recipe.cache import bump_version
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_pid = None
+
+
+def variant_name(name, variant):
+    """Return the storage name of a variant of the image name"""
+    root, ext = os.path.splitext(name)
+    return f"{root}_{variant}{ext}"
+
+
+def generate_variants(path, variants):
+    """Write a downscaled copy of the image at path for every variant.
+
+    Runs in a worker process, so it only touches the filesystem. Files
+    are written to a temp name and renamed, so a variant is never
+    visible half written.
+    """
+    with Image.open(path) as image:
+        image_format = image.format
+        if image_format == "JPEG" and image.mode not in ("RGB", "L"):
+            image = image.convert("RGB")
+        for variant, size in variants.items():
+            target = variant_name(path, variant)
+            resized = image.copy()
+            resized.thumbnail((size, size))
+            tmp_path = f"{target}.tmp"
+            resized.save(tmp_path, format=image_format)
+            os.replace(tmp_path, target)
+
+
+def get_executor():
+    """Return the process pool of the current process"""
+    global _executor, _executor_pid
+    # uWSGI forks workers after import, so each one needs its own pool
+    if _executor is None or _executor_pid != os.getpid():
+        _executor = ProcessPoolExecutor(
+            max_workers=settings.RECIPE_IMAGE_WORKERS,
+        )
+        _executor_pid = os.getpid()
+    return _executor
+
+
+def _variants_done(user_id, future):
+    if future.exception() is not None:
+        logger.error(
+            "Generating recipe image variants failed",
+            exc_info=future.exception(),
+        )
+        return
+    # The variant URLs change the recipe responses and their ETags
+    bump_version(user_id)
+
+
+def enqueue_variants(recipe):
+    """Generate the variants of a recipe image once the upload commits"""
+    image = recipe.image
+    path = image.path
+    variants = {
+        variant: size
+        for variant, size in settings.RECIPE_IMAGE_VARIANTS.items()
+        if not image.storage.exists(variant_name(image.name, variant))
+    }
+    if not variants:
+        # Images are shared by content, so a re-upload may be complete
+        return
+
+    def submit():
+        future = get_executor().submit(generate_variants, path, variants)
+        future.add_done_callback(
+            functools.partial(_variants_done, recipe.user_id),
+        )
+
+    transaction.on_commit(submit)
+
+
+def _delete_image(storage, name):
+    for variant in settings.RECIPE_IMAGE_VARIANTS:
+        storage.delete(variant_name(name, variant))
+    storage.delete(name)
+
+
+def release_images(names):
+    """Delete the images and their variants no recipe refers to.
+
+    Checks all of names with a single query, holding the locks of the
+    names until the files are deleted.
+    """
+    names = {name for name in names if name}
+    if not names:
+        return
+    storage = Recipe._meta.get_field("image").storage
+    with transaction.atomic():
+        # Waits for uploads of the same files to commit their references
+        lock_names(names)
+        used = set(
+            Recipe.objects.filter(image__in=names).values_list(
+                "image",
+                flat=True,
+            )
+        )
+        for name in names - used:
+            _delete_image(storage, name)
+
+
+def release_image(name):
+    """Delete an image and its variants once no recipe refers to it"""
+    release_images([name])
+
+
+# The image names collected by the active collect_released_images block
+_collected_names = contextvars.ContextVar("collected_names", default=None)
+
+
+@contextlib.contextmanager
+def collect_released_images():
+    """Release the images dropped in the block together on commit.
+
+    For deleting many recipes, where releasing every image on its own
+    would run a query per recipe.
+    """
+    names = set()
+    token = _collected_names.set(names)
+    try:
+        yield
+    finally:
+        _collected_names.reset(token)
+    if names:
+        transaction.on_commit(lambda: release_images(names))
+
+
+def release_image_on_commit(name):
+    """Release an image once the transaction dropping it commits"""
+    if not name:
+        return
+    collected = _collected_names.get()
+    if collected is not None:
+        collected.add(name)
+        return
+    transaction.on_commit(lambda: release_image(name))
+
+
+def variant_urls(image, request=None):
+    """Return the URLs of the variants of image that are ready"""
+    if not image:
+        return {}
+    urls = {}
+    for variant in settings.RECIPE_IMAGE_VARIANTS:
+        name = variant_name(image.name, variant)
+        if image.storage.exists(name):
+            url = image.storage.url(name)
+            urls[variant] = (
+                request.build_absolute_uri(url) if request else url
+            )
+    return urls
+
+
+def downscale(file, image, max_dimension):
+    """Return a copy of the uploaded image fitting in max_dimension.
+
+    JPEGs are decoded in draft mode at the smallest scale still larger
+    than the target, so the full size image is never held in memory.
+    """
+    image.draft("RGB", (max_dimension, max_dimension))
+    image.thumbnail((max_dimension, max_dimension))
+    resized = tempfile.SpooledTemporaryFile(
+        max_size=settings.FILE_UPLOAD_MAX_MEMORY_SIZE,
+    )
+    image.save(resized, format=image.format)
+    resized.seek(0)
+    return File(resized, name=file.name)
+
+
+class RecipeImageField(serializers.ImageField):
+    """Image field validating uploads from the image header only.
+
+    The upload is never fully decoded unless it has to be downscaled,
+    which keeps worker memory bounded for large or malicious images.
+    """
+
+    default_error_messages = {
+        "required": _(
+            "No image was submitted or it exceeded the maximum upload size."
+        ),
+        "too_large": _("Images can be at most {max_pixels} pixels."),
+    }
+
+    def to_internal_value(self, data):
+        file = serializers.FileField.to_internal_value(self, data)
+        if file.size > settings.MAX_UPLOAD_SIZE:
+            self.fail("required")
+
+        try:
+            image = Image.open(file)
+        except Image.DecompressionBombError:
+            self.fail("too_large", max_pixels=settings.RECIPE_IMAGE_MAX_PIXELS)
+        except Exception:
+            self.fail("invalid_image")
+
+        with image:
+            width, height = image.size
+            if width * height > settings.RECIPE_IMAGE_MAX_PIXELS:
+                self.fail(
+                    "too_large",
+                    max_pixels=settings.RECIPE_IMAGE_MAX_PIXELS,
+                )
+            max_dimension = settings.RECIPE_IMAGE_MAX_DIMENSION
+            if max(width, height) > max_dimension:
+                try:
+                    file = downscale(file, image, max_dimension)
+                except Exception:
+                    self.fail("invalid_image")
+
+        file.seek(0)
+        return file
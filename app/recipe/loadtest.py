@@ -0,0 +1,120 @@
+"""
+HTTP load test of the recipe API read endpoints against a running server.
+"""
+
+import http.client
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+# Read endpoints requested round robin by every client
+ENDPOINTS = [
+    "/api/recipe/recipes/",
+    "/api/recipe/recipes/{recipe_id}/",
+    "/api/recipe/tags/",
+    "/api/recipe/ingredients/",
+]
+
+
+def percentile(values, fraction):
+    """Return the nearest rank percentile of sorted values"""
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def _connection(url):
+    parts = urlsplit(url)
+    if parts.scheme == "https":
+        return http.client.HTTPSConnection(parts.netloc, timeout=30)
+    return http.client.HTTPConnection(parts.netloc, timeout=30)
+
+
+def run_client(url, paths, headers, deadline, offset, cache_bust):
+    """Request paths over one keep-alive connection until deadline.
+
+    Returns the latencies in seconds of the successful requests and the
+    number of failed ones.
+    """
+    prefix = urlsplit(url).path.rstrip("/")
+    connection = _connection(url)
+    latencies = []
+    errors = 0
+    count = offset
+    while time.monotonic() < deadline:
+        path = prefix + paths[count % len(paths)]
+        if cache_bust:
+            # A distinct query string misses the response cache
+            path = f"{path}?cache_bust={offset}-{count}"
+        count += 1
+
+        start = time.perf_counter()
+        status = None
+        # Servers may close idle keep-alive connections, retry once
+        for _ in range(2):
+            try:
+                connection.request("GET", path, headers=headers)
+                response = connection.getresponse()
+                response.read()
+            except (OSError, http.client.HTTPException):
+                connection.close()
+                continue
+            status = response.status
+            break
+        if status == 200:
+            latencies.append(time.perf_counter() - start)
+        else:
+            errors += 1
+    connection.close()
+    return latencies, errors
+
+
+def run_level(url, paths, token, concurrency, duration, cache_bust=False):
+    """Run concurrency clients for duration seconds and return the stats"""
+    headers = {"Authorization": f"Token {token}"}
+    deadline = time.monotonic() + duration
+    with ThreadPoolExecutor(concurrency) as pool:
+        results = list(
+            pool.map(
+                lambda offset: run_client(
+                    url,
+                    paths,
+                    headers,
+                    deadline,
+                    offset,
+                    cache_bust,
+                ),
+                range(concurrency),
+            )
+        )
+
+    latencies = sorted(
+        latency for client_latencies, _ in results
+        for latency in client_latencies
+    )
+    return {
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "errors": sum(errors for _, errors in results),
+        "rps": len(latencies) / duration,
+        "p50": percentile(latencies, 0.50) * 1000,
+        "p95": percentile(latencies, 0.95) * 1000,
+        "p99": percentile(latencies, 0.99) * 1000,
+    }
+
+
+def write_report(stdout, title, levels):
+    """Write one row of stats per concurrency level"""
+    stdout.write(f"== {title}")
+    stdout.write(
+        f"{'clients':>8} {'requests':>9} {'req/s':>9} {'p50 ms':>8} "
+        f"{'p95 ms':>8} {'p99 ms':>8} {'errors':>7}"
+    )
+    for level in levels:
+        stdout.write(
+            f"{level['concurrency']:>8} {level['requests']:>9} "
+            f"{level['rps']:>9.1f} {level['p50']:>8.1f} "
+            f"{level['p95']:>8.1f} {level['p99']:>8.1f} "
+            f"{level['errors']:>7}"
+        )
+    stdout.write("")
@@ -0,0 +1,62 @@
+"""
+Django command to benchmark the recipe API against a seeded dataset
+"""
+
+import uuid
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from recipe import benchmarks
+
+
+class Command(BaseCommand):
+    """Seed a throwaway dataset, run a benchmark and roll it back."""
+
+    help = (
+        "Run a recipe API benchmark against a seeded dataset. The "
+        "list_indexes scenario drops indexes, taking ACCESS EXCLUSIVE locks "
+        "that block every query on the recipe, tag and ingredient tables "
+        "until it finishes. It only runs with DEBUG set or --allow-locking."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("scenario", choices=sorted(benchmarks.SCENARIOS))
+        parser.add_argument("--recipes", type=int, default=10000)
+        parser.add_argument("--tags", type=int, default=200)
+        parser.add_argument("--ingredients", type=int, default=500)
+        parser.add_argument("--per-recipe", type=int, default=5)
+        parser.add_argument(
+            "--allow-locking",
+            action="store_true",
+            help=(
+                "Run scenarios taking ACCESS EXCLUSIVE table locks "
+                "(list_indexes) without DEBUG set."
+            ),
+        )
+
+    def handle(self, *args, **options):
+        scenario = options["scenario"]
+        locking = scenario in benchmarks.LOCKING_SCENARIOS
+        if locking and not (settings.DEBUG or options["allow_locking"]):
+            raise CommandError(
+                f"{scenario} takes ACCESS EXCLUSIVE locks on the recipe "
+                "tables. Pass --allow-locking to run it without DEBUG."
+            )
+
+        with transaction.atomic():
+            user = get_user_model().objects.create_user(
+                f"benchmark-{uuid.uuid4()}@example.com",
+                "benchmark",
+            )
+            data = benchmarks.seed(
+                user,
+                options["recipes"],
+                options["tags"],
+                options["ingredients"],
+                options["per_recipe"],
+            )
+            benchmarks.SCENARIOS[scenario](self.stdout, user, data)
+            transaction.set_rollback(True)
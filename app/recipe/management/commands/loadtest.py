@@ -0,0 +1,87 @@
+"""
+Django command to load test the recipe API of a running server
+"""
+
+import uuid
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from rest_framework.authtoken.models import Token
+
+from recipe import benchmarks, loadtest
+
+
+class Command(BaseCommand):
+    """Seed a user the server can read, load test it and delete it.
+
+    Run it once against each deployment mode (APP_SERVER=uwsgi and
+    APP_SERVER=asgi) sharing the database to compare them.
+    """
+
+    help = "Load test the recipe read endpoints of a running server."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "url",
+            help="Base URL of the server, e.g. http://localhost:8000",
+        )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            nargs="+",
+            default=[1, 4, 16, 64],
+            help="Numbers of concurrent clients to run in turn",
+        )
+        parser.add_argument(
+            "--duration",
+            type=float,
+            default=10,
+            help="Seconds each concurrency level runs for",
+        )
+        parser.add_argument(
+            "--cache-bust",
+            action="store_true",
+            help="Send distinct query strings to miss the response cache",
+        )
+        parser.add_argument("--label", default="")
+        parser.add_argument("--recipes", type=int, default=1000)
+        parser.add_argument("--tags", type=int, default=50)
+        parser.add_argument("--ingredients", type=int, default=100)
+        parser.add_argument("--per-recipe", type=int, default=5)
+
+    def handle(self, *args, **options):
+        # Committed, the server under test reads it from another process
+        user = get_user_model().objects.create_user(
+            f"loadtest-{uuid.uuid4()}@example.com",
+            "loadtest",
+        )
+        try:
+            token = Token.objects.create(user=user)
+            recipes, _, _ = benchmarks.seed(
+                user,
+                options["recipes"],
+                options["tags"],
+                options["ingredients"],
+                options["per_recipe"],
+            )
+            paths = [
+                path.format(recipe_id=recipes[0].id)
+                for path in loadtest.ENDPOINTS
+            ]
+            levels = [
+                loadtest.run_level(
+                    options["url"],
+                    paths,
+                    token.key,
+                    concurrency,
+                    options["duration"],
+                    options["cache_bust"],
+                )
+                for concurrency in options["concurrency"]
+            ]
+        finally:
+            user.delete()
+
+        title = " ".join(filter(None, [options["label"], options["url"]]))
+        loadtest.write_report(self.stdout, title, levels)
@@ -1,7 +1,13 @@
 """Serialziers for recipe API"""
 
+from django.conf import settings
+from django.db import transaction
+
+from drf_spectacular.utils import extend_schema_field
 from rest_framework import serializers
 from core.models import Recipe, Tag, Ingredient
+from recipe.cache import bump_version
+from recipe.images import RecipeImageField, variant_urls
 
 
 class TagSerializer(serializers.ModelSerializer):
@@ -22,7 +28,123 @@ class IngredientSerializer(serializers.ModelSerializer):
         read_only_fields = ["id"]
 
 
-class RecipeSerializer(serializers.ModelSerializer):
+class AutocompleteQuerySerializer(serializers.Serializer):
+    """Serializer for the query parameters of an autocomplete request."""
+
+    search = serializers.CharField(max_length=255)
+    limit = serializers.IntegerField(
+        min_value=1,
+        max_value=settings.AUTOCOMPLETE_MAX_LIMIT,
+        default=settings.AUTOCOMPLETE_LIMIT,
+    )
+
+
+class RecipeListSerializer(serializers.ListSerializer):
+    """Serializer for creating many recipes at once."""
+
+    @transaction.atomic
+    def create(self, validated_data):
+        """Create recipes with bulk inserts for recipes and relations."""
+        auth_user = self.context["request"].user
+        recipes = []
+        tag_names = []
+        ingredient_names = []
+        for data in validated_data:
+            data = dict(data)
+            tags = data.pop("tags", [])
+            ingredients = data.pop("ingredients", [])
+            recipes.append(Recipe(**data))
+            tag_names.append(list(dict.fromkeys(t["name"] for t in tags)))
+            ingredient_names.append(
+                list(dict.fromkeys(i["name"] for i in ingredients))
+            )
+
+        tags = {
+            tag.name: tag
+            for tag in Tag.objects.get_or_create_many(
+                auth_user,
+                [name for names in tag_names for name in names],
+            )
+        }
+        ingredients = {
+            ingredient.name: ingredient
+            for ingredient in Ingredient.objects.get_or_create_many(
+                auth_user,
+                [name for names in ingredient_names for name in names],
+            )
+        }
+        Recipe.objects.bulk_create(recipes)
+        Recipe.tags.through.objects.bulk_create(
+            Recipe.tags.through(recipe_id=recipe.id, tag_id=tags[name].id)
+            for recipe, names in zip(recipes, tag_names)
+            for name in names
+        )
+        Recipe.ingredients.through.objects.bulk_create(
+            Recipe.ingredients.through(
+                recipe_id=recipe.id,
+                ingredient_id=ingredients[name].id,
+            )
+            for recipe, names in zip(recipes, ingredient_names)
+            for name in names
+        )
+        # bulk_create sends no signals
+        bump_version(auth_user.id)
+
+        return recipes
+
+
+class SparseFieldsMixin:
+    """Serialize only the fields named in context["fields"], if given.
+
+    sparse_sources maps fields that are not read from a column of the
+    same name to the columns they need.
+    """
+
+    sparse_sources = {}
+
+    def get_fields(self):
+        fields = super().get_fields()
+        selected = self.context.get("fields")
+        if selected is None:
+            return fields
+        return {
+            name: field for name, field in fields.items() if name in selected
+        }
+
+    @classmethod
+    def select_fields(cls, fields=None, exclude=None):
+        """Return the field names selected by comma separated lists"""
+        available = list(cls().fields)
+        requested = fields.split(",") if fields else available
+        excluded = exclude.split(",") if exclude else []
+        unknown = set(requested).union(excluded).difference(available)
+        if unknown:
+            raise serializers.ValidationError(
+                {"fields": f"Unknown fields: {', '.join(sorted(unknown))}"},
+            )
+        return [name for name in requested if name not in excluded]
+
+    @classmethod
+    def sparse_queryset(cls, queryset, selected):
+        """Load only the columns and relations the selected fields use"""
+        fields = cls().fields
+        # The pk is needed for the prefetches, even with no columns picked
+        columns = {queryset.model._meta.pk.name}
+        prefetch = []
+        for name in selected:
+            field = fields[name]
+            if isinstance(field, serializers.ListSerializer):
+                prefetch.append(field.source)
+            else:
+                columns.update(cls.sparse_sources.get(name, [field.source]))
+        return (
+            queryset.only(*columns)
+            .defer("search_vector")
+            .prefetch_related(*prefetch)
+        )
+
+
+class RecipeSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Serializer for recipes."""
 
     tags = TagSerializer(many=True, required=False)
@@ -40,26 +162,30 @@ class RecipeSerializer(serializers.ModelSerializer):
             "ingredients",
         ]
         read_only_fields = ["id"]
+        list_serializer_class = RecipeListSerializer
 
     def _get_or_create_tags(self, tags, recipe):
         """Handle getting or creating tags as needed"""
         auth_user = self.context["request"].user
-        for tag in tags:
-            tag_obj, created = Tag.objects.get_or_create(
-                user=auth_user,
-                **tag,
+        if tags:
+            recipe.tags.add(
+                *Tag.objects.get_or_create_many(
+                    auth_user,
+                    [tag["name"] for tag in tags],
+                )
             )
-            recipe.tags.add(tag_obj)
 
     def _get_or_create_ingredients(self, ingredients, recipe):
         auth_user = self.context["request"].user
-        for ingredient in ingredients:
-            ingredient_object, created = Ingredient.objects.get_or_create(
-                user=auth_user,
-                **ingredient,
+        if ingredients:
+            recipe.ingredients.add(
+                *Ingredient.objects.get_or_create_many(
+                    auth_user,
+                    [ingredient["name"] for ingredient in ingredients],
+                )
             )
-            recipe.ingredients.add(ingredient_object)
 
+    @transaction.atomic
     def create(self, validated_data):
         """Create a recipe."""
         tags = validated_data.pop("tags", [])
@@ -70,6 +196,7 @@ class RecipeSerializer(serializers.ModelSerializer):
 
         return recipe
 
+    @transaction.atomic
     def update(self, instance, validated_data):
         """Update recipe"""
         tags = validated_data.pop("tags", None)
@@ -88,17 +215,92 @@ class RecipeSerializer(serializers.ModelSerializer):
         return instance
 
 
-class RecipeDetailSerializer(RecipeSerializer):
+class ImageVariantsMixin(serializers.Serializer):
+    """Expose the URLs of the resized variants of the recipe image."""
+
+    image_variants = serializers.SerializerMethodField()
+
+    sparse_sources = {"image_variants": ["image"]}
+
+    @extend_schema_field(serializers.DictField(child=serializers.URLField()))
+    def get_image_variants(self, recipe):
+        return variant_urls(recipe.image, self.context.get("request"))
+
+
+class RecipeDetailSerializer(ImageVariantsMixin, RecipeSerializer):
     """Serializer for recipe detail view."""
 
     class Meta(RecipeSerializer.Meta):
-        fields = RecipeSerializer.Meta.fields + ["description", "image"]
+        fields = RecipeSerializer.Meta.fields + [
+            "description",
+            "image",
+            "image_variants",
+        ]
+        # Images are only set through the validating upload-image action
+        read_only_fields = RecipeSerializer.Meta.read_only_fields + ["image"]
+
+
+class RecipeBulkResultSerializer(serializers.Serializer):
+    """Serializer for the result of one item of a bulk request."""
+
+    status = serializers.IntegerField()
+    data = RecipeDetailSerializer(required=False)
+    errors = serializers.DictField(required=False)
+
+
+class RecipeAttrChangeSerializer(serializers.Serializer):
+    """Serializer for changing the tags or ingredients of recipes."""
+
+    set = serializers.ListField(
+        child=serializers.CharField(max_length=255),
+        required=False,
+    )
+    add = serializers.ListField(
+        child=serializers.CharField(max_length=255),
+        required=False,
+    )
+    remove = serializers.ListField(
+        child=serializers.CharField(max_length=255),
+        required=False,
+    )
+
+    def validate(self, attrs):
+        if "set" in attrs and ("add" in attrs or "remove" in attrs):
+            raise serializers.ValidationError(
+                "Use either set or add/remove.",
+            )
+        return attrs
+
+
+class RecipeBulkDeleteSerializer(serializers.Serializer):
+    """Serializer for selecting recipes in a bulk request."""
+
+    ids = serializers.ListField(
+        child=serializers.IntegerField(),
+        allow_empty=False,
+        max_length=settings.RECIPE_BULK_MAX_ITEMS,
+    )
+
+
+class RecipeBulkUpdateSerializer(RecipeBulkDeleteSerializer):
+    """Serializer for changing the tags and ingredients of many recipes."""
+
+    tags = RecipeAttrChangeSerializer(required=False)
+    ingredients = RecipeAttrChangeSerializer(required=False)
+
+
+class RecipeBulkChangeResultSerializer(serializers.Serializer):
+    """Serializer for the result of a bulk update or delete."""
+
+    ids = serializers.ListField(child=serializers.IntegerField())
+    not_found = serializers.ListField(child=serializers.IntegerField())
+
 
+class RecipeImageSerializer(ImageVariantsMixin, serializers.ModelSerializer):
 
-class RecipeImageSerializer(serializers.ModelSerializer):
+    image = RecipeImageField(required=True)
 
     class Meta:
         model = Recipe
-        fields = ["id", "image"]
+        fields = ["id", "image", "image_variants"]
         read_only_fields = ["id"]
-        extra_kwargs = {"image": {"required": "True"}}
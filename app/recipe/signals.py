@@ -0,0 +1,35 @@
+"""
+Signal handlers invalidating the recipe response cache
+"""
+
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from core.models import Recipe, Tag, Ingredient
+from recipe.cache import bump_version
+from recipe.images import release_image_on_commit
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_save, sender=Tag)
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Recipe)
+@receiver(post_delete, sender=Tag)
+@receiver(post_delete, sender=Ingredient)
+def recipe_data_changed(sender, instance, **kwargs):
+    """Invalidate cached responses when recipe data is written"""
+    bump_version(instance.user_id)
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+@receiver(m2m_changed, sender=Recipe.ingredients.through)
+def recipe_relations_changed(sender, instance, action, **kwargs):
+    """Invalidate cached responses when recipe tags/ingredients change"""
+    if action.startswith("post_"):
+        bump_version(instance.user_id)
+
+
+@receiver(post_delete, sender=Recipe)
+def recipe_deleted(sender, instance, **kwargs):
+    """Release the image of a deleted recipe"""
+    release_image_on_commit(instance.image.name)
@@ -0,0 +1,155 @@
+"""Test the async recipe API views"""
+
+import asyncio
+from decimal import Decimal
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from rest_framework import status
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from core.models import Recipe, Tag, Ingredient
+from recipe.views import RecipeViewSet, TagViewSet, IngredientViewSet
+
+
+class AsyncViewTests(TestCase):
+    """Test the async views match the sync views"""
+
+    def setUp(self):
+        cache.clear()
+        self.factory = APIRequestFactory()
+        self.user = get_user_model().objects.create_user(
+            "user@example.com",
+            "testpass123",
+        )
+        tag = Tag.objects.create(user=self.user, name="Vegan")
+        ingredient = Ingredient.objects.create(user=self.user, name="Salt")
+        for i in range(3):
+            recipe = Recipe.objects.create(
+                user=self.user,
+                title=f"Recipe {i}",
+                time_minutes=i,
+                price=Decimal("5.25"),
+            )
+            recipe.tags.add(tag)
+            recipe.ingredients.add(ingredient)
+        self.recipe = recipe
+
+    def _request(self, method="get", path="/", data=None, **extra):
+        request = getattr(self.factory, method)(path, data, **extra)
+        force_authenticate(request, self.user)
+        return request
+
+    async def _both(self, viewset, actions, request, **kwargs):
+        """Return the responses of the sync and async views"""
+        basename = viewset.queryset.model._meta.model_name
+        sync_view = sync_to_async(
+            viewset.as_view(actions, basename=basename),
+        )
+        sync_response = await sync_view(request, **kwargs)
+        # Bypass the list cached by the sync view
+        await sync_to_async(cache.clear)()
+        async_view = viewset.as_async_view(actions, basename=basename)
+        return sync_response, await async_view(request, **kwargs)
+
+    async def test_recipe_list(self):
+        """Test the async recipe list matches the sync list"""
+        sync_res, async_res = await self._both(
+            RecipeViewSet,
+            {"get": "list"},
+            self._request(data={"page_size": 2}),
+        )
+
+        self.assertEqual(async_res.status_code, status.HTTP_200_OK)
+        self.assertEqual(async_res.data, sync_res.data)
+        self.assertEqual(len(async_res.data["results"]), 2)
+        self.assertIsNotNone(async_res.data["next"])
+
+    async def test_recipe_retrieve(self):
+        """Test the async recipe detail matches the sync detail"""
+        sync_res, async_res = await self._both(
+            RecipeViewSet,
+            {"get": "retrieve"},
+            self._request(),
+            pk=self.recipe.id,
+        )
+
+        self.assertEqual(async_res.status_code, status.HTTP_200_OK)
+        self.assertEqual(async_res.data, sync_res.data)
+        self.assertIn("ETag", async_res)
+
+    async def test_recipe_retrieve_not_found(self):
+        """Test other users' recipes are not found"""
+        other = await get_user_model().objects.acreate(email="o@example.com")
+        recipe = await Recipe.objects.acreate(
+            user=other,
+            title="Other",
+            time_minutes=1,
+            price=Decimal("1"),
+        )
+        view = RecipeViewSet.as_async_view({"get": "retrieve"})
+
+        res = await view(self._request(), pk=recipe.id)
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    async def test_not_modified(self):
+        """Test a matching If-None-Match is answered with 304"""
+        view = RecipeViewSet.as_async_view({"get": "list"})
+        res = await view(self._request())
+
+        res = await view(self._request(HTTP_IF_NONE_MATCH=res["ETag"]))
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    async def test_attr_lists(self):
+        """Test the async tag and ingredient lists match the sync lists"""
+        for viewset in [TagViewSet, IngredientViewSet]:
+            with self.subTest(viewset=viewset.__name__):
+                sync_res, async_res = await self._both(
+                    viewset,
+                    {"get": "list"},
+                    self._request(data={"assigned_only": 1}),
+                )
+
+                self.assertEqual(async_res.status_code, status.HTTP_200_OK)
+                self.assertEqual(async_res.data, sync_res.data)
+                self.assertEqual(len(async_res.data["results"]), 1)
+
+    async def test_unauthenticated(self):
+        """Test authentication still applies to async actions"""
+        view = RecipeViewSet.as_async_view({"get": "list"})
+
+        res = await view(self.factory.get("/"))
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    async def test_write_actions_run_sync_view(self):
+        """Test actions without an async implementation still work"""
+        view = RecipeViewSet.as_async_view({"get": "list", "post": "create"})
+        payload = {
+            "title": "New",
+            "time_minutes": 5,
+            "price": "2.50",
+        }
+
+        res = await view(self._request("post", data=payload, format="json"))
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertTrue(
+            await Recipe.objects.filter(id=res.data["id"]).aexists(),
+        )
+
+    def test_as_view_async_setting(self):
+        """Test as_view returns the async view only under ASGI"""
+        with override_settings(RECIPE_ASYNC_VIEWS=True):
+            view = TagViewSet.as_view({"get": "list"})
+        self.assertTrue(asyncio.iscoroutinefunction(view))
+        self.assertTrue(view.csrf_exempt)
+        self.assertIs(view.cls, TagViewSet)
+
+        view = TagViewSet.as_view({"get": "list"})
+        self.assertFalse(asyncio.iscoroutinefunction(view))
@@ -0,0 +1,91 @@
+"""Test the tag and ingredient autocomplete API"""
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Tag, Ingredient
+from recipe.autocomplete import trigram_enabled
+
+TAGS_AUTOCOMPLETE_URL = reverse("recipe:tag-autocomplete")
+INGREDIENTS_AUTOCOMPLETE_URL = reverse("recipe:ingredient-autocomplete")
+
+
+class AutocompleteTests(TestCase):
+    """Test autocompleting tag and ingredient names"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "user@example.com",
+            "testpass123",
+        )
+        self.client.force_authenticate(self.user)
+
+    def _names(self, url, search, **params):
+        res = self.client.get(url, {"search": search, **params})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return [item["name"] for item in res.data]
+
+    def test_autocomplete_prefix(self):
+        """Test names starting with the term are returned in order"""
+        for name in ["Tomato", "tofu", "Potato", "Tomatillo"]:
+            Ingredient.objects.create(user=self.user, name=name)
+
+        names = self._names(INGREDIENTS_AUTOCOMPLETE_URL, "to")
+
+        self.assertEqual(names[:3], ["tofu", "Tomatillo", "Tomato"])
+
+    def test_autocomplete_limited_to_user(self):
+        """Test only the authenticated user's names are returned"""
+        other_user = get_user_model().objects.create_user(
+            "other@example.com",
+            "testpass123",
+        )
+        Tag.objects.create(user=other_user, name="Vegan")
+        Tag.objects.create(user=self.user, name="Vegetarian")
+
+        names = self._names(TAGS_AUTOCOMPLETE_URL, "veg")
+
+        self.assertEqual(names, ["Vegetarian"])
+
+    def test_autocomplete_limit(self):
+        """Test the number of names returned is limited"""
+        for i in range(5):
+            Tag.objects.create(user=self.user, name=f"Tag {i}")
+
+        names = self._names(TAGS_AUTOCOMPLETE_URL, "tag", limit=2)
+
+        self.assertEqual(names, ["Tag 0", "Tag 1"])
+
+    def test_autocomplete_invalid_params(self):
+        """Test a missing term or a limit over the maximum is rejected"""
+        res = self.client.get(TAGS_AUTOCOMPLETE_URL)
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+        res = self.client.get(
+            TAGS_AUTOCOMPLETE_URL,
+            {"search": "a", "limit": 10000},
+        )
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_autocomplete_escapes_wildcards(self):
+        """Test LIKE wildcards in the term are matched literally"""
+        Tag.objects.create(user=self.user, name="Quick")
+
+        self.assertEqual(self._names(TAGS_AUTOCOMPLETE_URL, "%"), [])
+
+    def test_autocomplete_fuzzy(self):
+        """Test misspelled terms match similar names after prefixes"""
+        if not trigram_enabled():
+            self.skipTest("pg_trgm is not installed")
+        for name in ["Cinnamon", "Cinnamon sugar", "Chives"]:
+            Ingredient.objects.create(user=self.user, name=name)
+
+        names = self._names(INGREDIENTS_AUTOCOMPLETE_URL, "cinamon")
+
+        self.assertEqual(names[0], "Cinnamon")
+        self.assertNotIn("Chives", names)
@@ -0,0 +1,341 @@
+"""Test the recipe bulk API"""
+
+import tempfile
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe, Tag, Ingredient
+from core.testing import QueryBudgetMixin, create_recipe
+
+RECIPES_URL = reverse("recipe:recipe-list")
+BULK_URL = reverse("recipe:recipe-bulk")
+
+
+def recipe_payload(title, tags=(), ingredients=()):
+    """Return a recipe payload for the bulk endpoints"""
+    return {
+        "title": title,
+        "time_minutes": 10,
+        "price": "2.50",
+        "tags": [{"name": name} for name in tags],
+        "ingredients": [{"name": name} for name in ingredients],
+    }
+
+
+class BulkCreateTests(QueryBudgetMixin, TestCase):
+    """Test creating recipes in bulk"""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "user@example.com",
+            "testpass123",
+        )
+        self.client.force_authenticate(self.user)
+
+    def test_bulk_create(self):
+        """Test creating recipes with shared tags and ingredients"""
+        existing = Tag.objects.create(user=self.user, name="Vegan")
+        payload = [
+            recipe_payload("one", ["Vegan", "Dinner"], ["salt"]),
+            recipe_payload("two", ["Dinner", "Dinner"], ["salt", "pepper"]),
+        ]
+
+        res = self.client.post(BULK_URL, payload, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            [result["data"]["title"] for result in res.data],
+            ["one", "two"],
+        )
+        self.assertEqual(Tag.objects.filter(user=self.user).count(), 2)
+        self.assertEqual(Ingredient.objects.filter(user=self.user).count(), 2)
+        one = Recipe.objects.get(id=res.data[0]["data"]["id"])
+        two = Recipe.objects.get(id=res.data[1]["data"]["id"])
+        self.assertIn(existing, one.tags.all())
+        self.assertEqual(two.tags.count(), 1)
+        self.assertEqual(two.ingredients.count(), 2)
+        self.assertEqual(one.user, self.user)
+        self.assertEqual(
+            [tag["name"] for tag in res.data[1]["data"]["tags"]],
+            ["Dinner"],
+        )
+
+    def test_bulk_create_ignores_list_filters(self):
+        """Test list query params do not drop the created recipes"""
+        tag = Tag.objects.create(user=self.user, name="Other")
+
+        res = self.client.post(
+            f"{BULK_URL}?tags={tag.id}&ingredients={tag.id}",
+            [recipe_payload("one", ["Vegan"])],
+            format="json",
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.data[0]["data"]["title"], "one")
+
+    def test_bulk_create_partial_errors(self):
+        """Test invalid items are reported without blocking valid ones"""
+        payload = [
+            recipe_payload("valid"),
+            {"title": "missing fields"},
+        ]
+
+        res = self.client.post(BULK_URL, payload, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_207_MULTI_STATUS)
+        self.assertEqual(res.data[0]["status"], status.HTTP_201_CREATED)
+        self.assertEqual(res.data[1]["status"], status.HTTP_400_BAD_REQUEST)
+        self.assertIn("time_minutes", res.data[1]["errors"])
+        self.assertEqual(Recipe.objects.filter(user=self.user).count(), 1)
+
+    def test_bulk_create_all_invalid(self):
+        """Test nothing is created when every item is invalid"""
+        res = self.client.post(BULK_URL, [{"title": "x"}], format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Recipe.objects.exists())
+
+    def test_bulk_create_requires_list(self):
+        """Test the payload must be a list"""
+        res = self.client.post(BULK_URL, recipe_payload("x"), format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @override_settings(RECIPE_BULK_MAX_ITEMS=1)
+    def test_bulk_create_max_items(self):
+        """Test batches over the limit are rejected"""
+        payload = [recipe_payload("one"), recipe_payload("two")]
+
+        res = self.client.post(BULK_URL, payload, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Recipe.objects.exists())
+
+    def test_bulk_create_rolls_back_on_error(self):
+        """Test a failed write leaves no partial batch behind"""
+        payload = [recipe_payload("one", ["Tag"])]
+
+        with patch(
+            "recipe.serializers.Recipe.ingredients.through.objects"
+            ".bulk_create",
+            side_effect=RuntimeError,
+        ):
+            with self.assertRaises(RuntimeError):
+                self.client.post(BULK_URL, payload, format="json")
+
+        self.assertFalse(Recipe.objects.exists())
+        self.assertFalse(Tag.objects.exists())
+
+    def test_bulk_create_query_budget(self):
+        """Test the number of queries does not grow with the batch"""
+        payload = []
+        # Names that already exist are read back in an extra query
+        Tag.objects.create(user=self.user, name="shared")
+        Ingredient.objects.create(user=self.user, name="shared")
+
+        def add_recipes():
+            start = len(payload)
+            for i in range(start, start + 10):
+                payload.append(
+                    recipe_payload(
+                        f"r{i}",
+                        [f"t{i}", "shared"],
+                        [f"i{i}", "shared"],
+                    )
+                )
+
+        add_recipes()
+        self.assertQueryBudget(
+            lambda: self.client.post(BULK_URL, payload, format="json"),
+            add_recipes,
+            max_queries=12,
+        )
+
+    def test_bulk_create_invalidates_cache(self):
+        """Test bulk created recipes show up in a cached list"""
+        self.client.get(RECIPES_URL)
+
+        self.client.post(BULK_URL, [recipe_payload("new")], format="json")
+        res = self.client.get(RECIPES_URL)
+
+        self.assertEqual(len(res.data["results"]), 1)
+
+
+class BulkUpdateDeleteTests(QueryBudgetMixin, TestCase):
+    """Test changing and deleting recipes in bulk"""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "user@example.com",
+            "testpass123",
+        )
+        self.client.force_authenticate(self.user)
+        self.recipes = [
+            create_recipe(self.user, title=f"r{i}") for i in range(3)
+        ]
+        self.ids = [recipe.id for recipe in self.recipes]
+
+    def _tag_names(self, recipe):
+        return sorted(recipe.tags.values_list("name", flat=True))
+
+    def test_bulk_set_tags(self):
+        """Test replacing the tags of many recipes"""
+        old = Tag.objects.create(user=self.user, name="Old")
+        self.recipes[0].tags.add(old)
+        payload = {"ids": self.ids, "tags": {"set": ["Lunch", "Vegan"]}}
+
+        res = self.client.patch(BULK_URL, payload, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(sorted(res.data["ids"]), sorted(self.ids))
+        for recipe in self.recipes:
+            self.assertEqual(self._tag_names(recipe), ["Lunch", "Vegan"])
+
+    def test_bulk_add_remove(self):
+        """Test adding and removing tags and ingredients"""
+        keep = Tag.objects.create(user=self.user, name="Keep")
+        drop = Tag.objects.create(user=self.user, name="Drop")
+        self.recipes[0].tags.add(keep, drop)
+        payload = {
+            "ids": self.ids,
+            "tags": {"add": ["Keep", "New"], "remove": ["Drop"]},
+            "ingredients": {"add": ["salt"]},
+        }
+
+        res = self.client.patch(BULK_URL, payload, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        for recipe in self.recipes:
+            self.assertEqual(self._tag_names(recipe), ["Keep", "New"])
+            self.assertEqual(recipe.ingredients.count(), 1)
+
+    def test_set_with_add_invalid(self):
+        """Test set can not be combined with add or remove"""
+        payload = {"ids": self.ids, "tags": {"set": ["a"], "add": ["b"]}}
+
+        res = self.client.patch(BULK_URL, payload, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_bulk_update_other_user_recipe(self):
+        """Test recipes of other users are not changed"""
+        other_user = get_user_model().objects.create_user(
+            "other@example.com",
+            "testpass123",
+        )
+        other = create_recipe(other_user, title="other")
+        payload = {"ids": [self.ids[0], other.id], "tags": {"add": ["x"]}}
+
+        res = self.client.patch(BULK_URL, payload, format="json")
+
+        self.assertEqual(res.data["ids"], [self.ids[0]])
+        self.assertEqual(res.data["not_found"], [other.id])
+        self.assertEqual(other.tags.count(), 0)
+
+    def test_bulk_delete(self):
+        """Test deleting many recipes enforces ownership"""
+        other_user = get_user_model().objects.create_user(
+            "other@example.com",
+            "testpass123",
+        )
+        other = create_recipe(other_user, title="other")
+        self.recipes[0].tags.add(Tag.objects.create(user=self.user, name="t"))
+
+        res = self.client.delete(
+            BULK_URL,
+            {"ids": self.ids[:2] + [other.id]},
+            format="json",
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["not_found"], [other.id])
+        self.assertEqual(
+            list(Recipe.objects.filter(user=self.user)),
+            [self.recipes[2]],
+        )
+        self.assertTrue(Recipe.objects.filter(id=other.id).exists())
+
+    def test_bulk_update_query_budget(self):
+        """Test bulk updates run a fixed number of queries"""
+
+        def add_recipes():
+            for i in range(10):
+                self.ids.append(create_recipe(self.user, title=f"new {i}").id)
+
+        Tag.objects.create(user=self.user, name="a")
+        Ingredient.objects.create(user=self.user, name="c")
+        payload = {
+            "ids": self.ids,
+            "tags": {"set": ["a"]},
+            "ingredients": {"add": ["c"], "remove": ["d"]},
+        }
+        self.assertQueryBudget(
+            lambda: self.client.patch(BULK_URL, payload, format="json"),
+            add_recipes,
+            max_queries=12,
+        )
+
+    def test_bulk_delete_query_budget(self):
+        """Test bulk deletes and the image releases run fixed queries"""
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        settings = override_settings(MEDIA_ROOT=media.name)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        storage = Recipe._meta.get_field("image").storage
+        ids = []
+        images = []
+
+        def add_recipes(count):
+            for i in range(len(images), len(images) + count):
+                image = storage.save(
+                    "uploads/recipe/image.jpg",
+                    ContentFile(f"image {i}".encode()),
+                )
+                images.append(image)
+                # Two recipes sharing an image release it once
+                for title in (f"new {i}", f"copy {i}"):
+                    recipe = create_recipe(
+                        self.user,
+                        title=title,
+                        image=image,
+                        tags=[title],
+                    )
+                    ids.append(recipe.id)
+
+        def delete():
+            with self.captureOnCommitCallbacks(execute=True):
+                res = self.client.delete(BULK_URL, {"ids": ids}, format="json")
+            self.assertEqual(len(res.data["ids"]), len(ids))
+            ids.clear()
+
+        add_recipes(2)
+        self.assertQueryBudget(
+            delete,
+            lambda: add_recipes(10),
+            max_queries=11,
+        )
+        self.assertFalse(any(storage.exists(name) for name in images))
+
+    def test_bulk_update_invalidates_cache(self):
+        """Test bulk updates show up in a cached list"""
+        self.client.get(RECIPES_URL)
+        payload = {"ids": self.ids, "tags": {"add": ["new"]}}
+
+        self.client.patch(BULK_URL, payload, format="json")
+        res = self.client.get(RECIPES_URL)
+
+        for recipe in res.data["results"]:
+            self.assertEqual(recipe["tags"][0]["name"], "new")
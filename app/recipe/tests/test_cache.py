@@ -0,0 +1,260 @@
+"""Test the recipe response cache"""
+
+import tempfile
+
+from PIL import Image
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Tag
+from core.cache import is_shared_cache
+from core.testing import (
+    QueryBudgetMixin,
+    create_recipe,
+    run_in_other_process,
+)
+from recipe.cache import get_version
+
+LOCAL_CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+}
+
+RECIPES_URL = reverse("recipe:recipe-list")
+TAGS_URL = reverse("recipe:tag-list")
+
+
+class ResponseCacheTests(QueryBudgetMixin, TestCase):
+    """Test list responses are cached until the user's data changes"""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "user@example.com",
+            "testpass123",
+        )
+        self.client.force_authenticate(self.user)
+
+    def _titles(self, params=None):
+        res = self.client.get(RECIPES_URL, params)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return [recipe["title"] for recipe in res.data["results"]]
+
+    def test_list_served_from_cache(self):
+        """Test a repeated list request does not query the database"""
+        create_recipe(user=self.user)
+        self.client.get(RECIPES_URL)
+
+        queries = self.count_queries(lambda: self.client.get(RECIPES_URL))
+
+        self.assertEqual(queries, 0)
+
+    def test_cache_shared_between_processes(self):
+        """Test the configured cache is shared by all the app workers"""
+        self.assertTrue(is_shared_cache())
+
+        run_in_other_process(
+            "from django.core.cache import cache; "
+            "cache.set('cache-test:shared', 'other process', 60)"
+        )
+
+        self.assertEqual(cache.get("cache-test:shared"), "other process")
+
+    @override_settings(CACHES=LOCAL_CACHES)
+    def test_process_local_cache_not_used(self):
+        """Test responses are not cached in a process local backend"""
+        create_recipe(user=self.user)
+        self.client.get(RECIPES_URL)
+
+        queries = self.count_queries(lambda: self.client.get(RECIPES_URL))
+
+        self.assertFalse(is_shared_cache())
+        self.assertGreater(queries, 0)
+
+    def test_cache_keyed_by_query_params(self):
+        """Test different filters are cached separately"""
+        tag = Tag.objects.create(user=self.user, name="Tag")
+        recipe = create_recipe(user=self.user, title="tagged")
+        recipe.tags.add(tag)
+        create_recipe(user=self.user, title="untagged")
+
+        self.assertEqual(len(self._titles()), 2)
+        self.assertEqual(self._titles({"tags": tag.id}), ["tagged"])
+
+    def test_cache_scoped_to_user(self):
+        """Test users never see each other's cached responses"""
+        create_recipe(user=self.user, title="mine")
+        self._titles()
+        other = get_user_model().objects.create_user(
+            "other@example.com",
+            "testpass123",
+        )
+        self.client.force_authenticate(other)
+
+        self.assertEqual(self._titles(), [])
+
+    def test_create_invalidates(self):
+        """Test creating a recipe invalidates the cached list"""
+        self._titles()
+        payload = {"title": "new", "time_minutes": 5, "price": "1.00"}
+
+        self.client.post(RECIPES_URL, payload)
+
+        self.assertEqual(self._titles(), ["new"])
+
+    def test_update_and_delete_invalidate(self):
+        """Test updating and deleting a recipe invalidates the cache"""
+        recipe = create_recipe(user=self.user, title="old")
+        url = reverse("recipe:recipe-detail", args=[recipe.id])
+        self._titles()
+
+        self.client.patch(url, {"title": "new"})
+        self.assertEqual(self._titles(), ["new"])
+
+        self.client.delete(url)
+        self.assertEqual(self._titles(), [])
+
+    def test_m2m_change_invalidates(self):
+        """Test changing a recipe's tags invalidates the cache"""
+        recipe = create_recipe(user=self.user)
+        tag = Tag.objects.create(user=self.user, name="Tag")
+        self._titles({"tags": tag.id})
+
+        recipe.tags.add(tag)
+
+        self.assertEqual(len(self._titles({"tags": tag.id})), 1)
+
+    def test_tag_rename_invalidates_recipe_list(self):
+        """Test renaming a tag refreshes the cached recipe list"""
+        recipe = create_recipe(user=self.user)
+        tag = Tag.objects.create(user=self.user, name="Old")
+        recipe.tags.add(tag)
+        self.client.get(RECIPES_URL)
+
+        url = reverse("recipe:tag-detail", args=[tag.id])
+        self.client.patch(url, {"name": "New"})
+        res = self.client.get(RECIPES_URL)
+
+        self.assertEqual(res.data["results"][0]["tags"][0]["name"], "New")
+
+    def test_tag_list_invalidated(self):
+        """Test the tag list is refreshed after a tag is created"""
+        self.client.get(TAGS_URL)
+        Tag.objects.create(user=self.user, name="Tag")
+
+        res = self.client.get(TAGS_URL)
+
+        self.assertEqual(len(res.data["results"]), 1)
+
+    def test_upload_image_bumps_version(self):
+        """Test uploading an image invalidates the user's cache"""
+        recipe = create_recipe(user=self.user)
+        version = get_version(self.user.id)
+        url = reverse("recipe:recipe-upload-image", args=[recipe.id])
+
+        with tempfile.NamedTemporaryFile(suffix=".jpg") as image_file:
+            Image.new("RGB", (10, 10)).save(image_file, format="JPEG")
+            image_file.seek(0)
+            self.client.post(url, {"image": image_file}, format="multipart")
+
+        self.assertGreater(get_version(self.user.id), version)
+        recipe.refresh_from_db()
+        recipe.image.delete()
+
+
+class ConditionalGetTests(QueryBudgetMixin, TestCase):
+    """Test ETags and conditional GET on the recipe endpoints"""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "user@example.com",
+            "testpass123",
+        )
+        self.client.force_authenticate(self.user)
+        self.recipe = create_recipe(user=self.user)
+        self.detail_url = reverse(
+            "recipe:recipe-detail",
+            args=[self.recipe.id],
+        )
+
+    def test_etag_not_modified(self):
+        """Test a matching If-None-Match returns 304 without queries"""
+        for url in [RECIPES_URL, self.detail_url, TAGS_URL]:
+            etag = self.client.get(url)["ETag"]
+            res = None
+
+            def conditional_request():
+                nonlocal res
+                res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+            self.assertEqual(self.count_queries(conditional_request), 0)
+            self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+            self.assertEqual(res["ETag"], etag)
+            self.assertEqual(res.content, b"")
+
+    def test_etag_changes_on_write(self):
+        """Test the ETag no longer matches after the recipe changes"""
+        etag = self.client.get(self.detail_url)["ETag"]
+
+        self.client.patch(self.detail_url, {"title": "new"})
+        res = self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res["ETag"], etag)
+        self.assertEqual(res.data["title"], "new")
+
+    def test_etag_changes_on_write_in_other_process(self):
+        """Test a version bumped by another worker invalidates the ETag"""
+        etag = self.client.get(RECIPES_URL)["ETag"]
+
+        run_in_other_process(
+            "from recipe.cache import bump_version; "
+            f"bump_version({self.user.id})"
+        )
+        res = self.client.get(RECIPES_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res["ETag"], etag)
+
+    @override_settings(CACHES=LOCAL_CACHES)
+    def test_no_etag_with_process_local_cache(self):
+        """Test no ETag is sent when versions are not shared"""
+        res = self.client.get(self.detail_url)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotIn("ETag", res)
+
+    def test_etag_differs_per_resource(self):
+        """Test ETags differ between query params and recipes"""
+        other = create_recipe(user=self.user)
+        other_url = reverse("recipe:recipe-detail", args=[other.id])
+
+        etags = {
+            self.client.get(self.detail_url)["ETag"],
+            self.client.get(other_url)["ETag"],
+            self.client.get(RECIPES_URL)["ETag"],
+            self.client.get(RECIPES_URL, {"page_size": 1})["ETag"],
+        }
+
+        self.assertEqual(len(etags), 4)
+
+    def test_etag_differs_per_user(self):
+        """Test another user's ETag never matches"""
+        etag = self.client.get(RECIPES_URL)["ETag"]
+        other = get_user_model().objects.create_user(
+            "other@example.com",
+            "testpass123",
+        )
+        self.client.force_authenticate(other)
+
+        res = self.client.get(RECIPES_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
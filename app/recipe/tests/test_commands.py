@@ -0,0 +1,126 @@
+"""Test the recipe management commands"""
+
+from io import StringIO
+
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import LiveServerTestCase, TestCase
+
+from core.models import Recipe, Tag
+from recipe.loadtest import percentile
+
+
+class BenchmarkCommandTests(TestCase):
+    """Test the benchmark command"""
+
+    def test_recipe_filters_benchmark(self):
+        """Test the filter benchmark prints plans and rolls back its data"""
+        out = StringIO()
+
+        call_command(
+            "benchmark",
+            "recipe_filters",
+            recipes=20,
+            tags=5,
+            ingredients=5,
+            stdout=out,
+        )
+
+        self.assertIn("== recipes: EXISTS", out.getvalue())
+        self.assertIn("== assigned tags: EXISTS", out.getvalue())
+        self.assertFalse(Recipe.objects.exists())
+
+    def test_list_indexes_benchmark(self):
+        """Test the index benchmark restores the indexes it drops"""
+        out = StringIO()
+
+        call_command(
+            "benchmark",
+            "list_indexes",
+            recipes=20,
+            tags=5,
+            ingredients=5,
+            allow_locking=True,
+            stdout=out,
+        )
+
+        self.assertIn("== recipes by -id: indexed", out.getvalue())
+        self.assertIn("== tags by -name: unindexed", out.getvalue())
+        with connection.cursor() as cursor:
+            constraints = connection.introspection.get_constraints(
+                cursor,
+                Tag._meta.db_table,
+            )
+        self.assertIn("core_tag_user_name_unique", constraints)
+
+    def test_list_indexes_requires_allow_locking(self):
+        """Test the index benchmark refuses to lock tables by default"""
+        with self.assertRaisesMessage(CommandError, "--allow-locking"):
+            call_command("benchmark", "list_indexes", recipes=1)
+
+    def test_list_serialization_benchmark(self):
+        """Test the serialization benchmark checks both outputs match"""
+        out = StringIO()
+
+        call_command(
+            "benchmark",
+            "list_serialization",
+            recipes=20,
+            tags=5,
+            ingredients=5,
+            stdout=out,
+        )
+
+        self.assertIn("== values() rows:", out.getvalue())
+        self.assertIn("identical JSON: True", out.getvalue())
+
+    def test_json_rendering_benchmark(self):
+        """Test the JSON benchmark times both renderers"""
+        out = StringIO()
+
+        call_command(
+            "benchmark",
+            "json_rendering",
+            recipes=20,
+            tags=5,
+            ingredients=5,
+            stdout=out,
+        )
+
+        self.assertIn("== JSONRenderer: render", out.getvalue())
+        self.assertIn("== ORJSONRenderer: render", out.getvalue())
+
+
+class LoadTestCommandTests(LiveServerTestCase):
+    """Test the load test command"""
+
+    def test_loadtest(self):
+        """Test every concurrency level is reported and data removed"""
+        out = StringIO()
+
+        call_command(
+            "loadtest",
+            self.live_server_url,
+            concurrency=[1, 2],
+            duration=0.5,
+            recipes=5,
+            tags=2,
+            ingredients=2,
+            stdout=out,
+        )
+
+        rows = out.getvalue().splitlines()[2:4]
+        self.assertEqual([row.split()[0] for row in rows], ["1", "2"])
+        for row in rows:
+            requests, errors = int(row.split()[1]), int(row.split()[-1])
+            self.assertGreater(requests, 0)
+            self.assertEqual(errors, 0)
+        self.assertFalse(Recipe.objects.exists())
+
+    def test_percentile(self):
+        """Test the nearest rank percentile"""
+        values = list(range(1, 101))
+
+        self.assertEqual(percentile(values, 0.5), 51)
+        self.assertEqual(percentile(values, 0.99), 100)
+        self.assertEqual(percentile([], 0.5), 0.0)
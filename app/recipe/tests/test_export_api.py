@@ -0,0 +1,134 @@
+"""Test the recipe export API"""
+
+import json
+
+from asgiref.sync import async_to_sync
+from django.contrib.auth import get_user_model
+from django.core.handlers.asgi import ASGIHandler
+from django.core.signals import request_started
+from django.db import close_old_connections
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from core.models import Recipe
+from core.testing import QueryBudgetMixin, create_recipe
+from recipe.serializers import RecipeDetailSerializer
+
+EXPORT_URL = reverse("recipe:recipe-export")
+
+
+class ExportTests(QueryBudgetMixin, TestCase):
+    """Test exporting recipes as NDJSON"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "user@example.com",
+            "testpass123",
+        )
+        self.client.force_authenticate(self.user)
+
+    def _export(self, params=None):
+        res = self.client.get(EXPORT_URL, params)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        content = b"".join(res.streaming_content).decode()
+        return [json.loads(line) for line in content.splitlines()]
+
+    def test_export_recipes(self):
+        """Test every recipe of the user is exported with relations"""
+        recipes = [
+            create_recipe(
+                self.user,
+                title=f"r{i}",
+                tags=[f"tag {i}"],
+                ingredients=[f"ingredient {i}"],
+            )
+            for i in range(3)
+        ]
+        other_user = get_user_model().objects.create_user(
+            "other@example.com",
+            "testpass123",
+        )
+        create_recipe(other_user, title="other")
+
+        res = self.client.get(EXPORT_URL)
+        rows = self._export()
+
+        self.assertEqual(res["Content-Type"], "application/x-ndjson")
+        self.assertEqual(
+            rows,
+            [
+                json.loads(json.dumps(RecipeDetailSerializer(recipe).data))
+                for recipe in reversed(recipes)
+            ],
+        )
+
+    def test_export_filters(self):
+        """Test the export honours the tag filter"""
+        recipe = create_recipe(self.user, title="tagged", tags=["tagged"])
+        create_recipe(self.user, title="other", tags=["other"])
+        tag = recipe.tags.get()
+
+        rows = self._export({"tags": tag.id})
+
+        self.assertEqual([row["id"] for row in rows], [recipe.id])
+
+    @override_settings(RECIPE_EXPORT_CHUNK_SIZE=100)
+    def test_export_query_budget(self):
+        """Test the export does not run queries per recipe"""
+
+        def add_recipes():
+            for i in range(5):
+                name = f"{Recipe.objects.count()} {i}"
+                create_recipe(
+                    self.user,
+                    title=name,
+                    tags=[name],
+                    ingredients=[name],
+                )
+
+        add_recipes()
+        self.assertQueryBudget(self._export, add_recipes, max_queries=3)
+
+    def test_export_under_asgi(self):
+        """Test the export streams through the ASGI handler.
+
+        Django 4.1 iterates streaming responses on the event loop, where
+        the queries of a lazy export would fail.
+        """
+        recipes = [create_recipe(self.user, title=f"r{i}") for i in range(3)]
+        token = Token.objects.create(user=self.user)
+        # Closing the connection would end the test transaction
+        request_started.disconnect(close_old_connections)
+        self.addCleanup(request_started.connect, close_old_connections)
+
+        messages = []
+
+        async def receive():
+            return {"type": "http.request"}
+
+        async def send(message):
+            messages.append(message)
+
+        scope = {
+            "type": "http",
+            "method": "GET",
+            "path": EXPORT_URL,
+            "query_string": b"",
+            "headers": [
+                (b"host", b"testserver"),
+                (b"authorization", f"Token {token.key}".encode()),
+            ],
+        }
+        async_to_sync(ASGIHandler())(scope, receive, send)
+
+        self.assertEqual(messages[0]["status"], status.HTTP_200_OK)
+        body = b"".join(message.get("body", b"") for message in messages)
+        self.assertEqual(
+            [json.loads(line)["id"] for line in body.splitlines()],
+            [recipe.id for recipe in reversed(recipes)],
+        )
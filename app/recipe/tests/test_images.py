@@ -0,0 +1,406 @@
+"""Test resized variants of recipe images"""
+
+import hashlib
+import io
+import os
+import tempfile
+from concurrent.futures import Future
+from decimal import Decimal
+from unittest.mock import patch
+
+import psycopg2
+from PIL import Image
+
+from django.contrib.auth import get_user_model
+from django.db import OperationalError, connection, transaction
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe
+from core.storage import lock_key
+from recipe.images import generate_variants, release_image, variant_name
+
+VARIANTS = {"thumb": 20, "medium": 50}
+
+
+class SyncExecutor:
+    """Executor running submitted work right away"""
+
+    def submit(self, fn, *args):
+        future = Future()
+        future.set_result(fn(*args))
+        return future
+
+
+class DeferredExecutor:
+    """Executor running submitted work once run() is called"""
+
+    def __init__(self):
+        self.pending = []
+
+    def submit(self, fn, *args):
+        future = Future()
+        self.pending.append((future, fn, args))
+        return future
+
+    def run(self):
+        for future, fn, args in self.pending:
+            future.set_result(fn(*args))
+
+
+class GenerateVariantsTests(TestCase):
+    """Test generating image variants"""
+
+    def test_generate_variants(self):
+        """Test each variant is downscaled to fit its size"""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "image.jpg")
+            Image.new("RGB", (200, 100)).save(path, format="JPEG")
+
+            generate_variants(path, VARIANTS)
+
+            with Image.open(variant_name(path, "thumb")) as thumb:
+                self.assertEqual(thumb.size, (20, 10))
+                self.assertEqual(thumb.format, "JPEG")
+            with Image.open(variant_name(path, "medium")) as medium:
+                self.assertEqual(medium.size, (50, 25))
+            self.assertEqual(
+                sorted(os.listdir(tmp_dir)),
+                ["image.jpg", "image_medium.jpg", "image_thumb.jpg"],
+            )
+
+    def test_generate_variants_keeps_small_images(self):
+        """Test images smaller than a variant are not upscaled"""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "image.png")
+            Image.new("RGBA", (10, 10)).save(path, format="PNG")
+
+            generate_variants(path, VARIANTS)
+
+            with Image.open(variant_name(path, "medium")) as medium:
+                self.assertEqual(medium.size, (10, 10))
+                self.assertEqual(medium.mode, "RGBA")
+
+
+@override_settings(RECIPE_IMAGE_VARIANTS=VARIANTS)
+class ImageVariantsAPITests(TestCase):
+    """Test variants are generated for uploads and exposed by the API"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "user@example.com",
+            "testpass123",
+        )
+        self.client.force_authenticate(self.user)
+        self.recipe = Recipe.objects.create(
+            user=self.user,
+            title="Sample",
+            time_minutes=5,
+            price=Decimal("1.00"),
+        )
+
+    def tearDown(self):
+        self.recipe.refresh_from_db()
+        if self.recipe.image:
+            for variant in VARIANTS:
+                name = variant_name(self.recipe.image.name, variant)
+                self.recipe.image.storage.delete(name)
+            self.recipe.image.delete()
+
+    def _upload(self):
+        url = reverse("recipe:recipe-upload-image", args=[self.recipe.id])
+        with tempfile.NamedTemporaryFile(suffix=".jpg") as image_file:
+            Image.new("RGB", (100, 100)).save(image_file, format="JPEG")
+            image_file.seek(0)
+            return self.client.post(
+                url,
+                {"image": image_file},
+                format="multipart",
+            )
+
+    @patch("recipe.images.get_executor")
+    def test_upload_enqueues_variants_on_commit(self, patched_executor):
+        """Test the upload only schedules the variants"""
+        with self.captureOnCommitCallbacks() as callbacks:
+            res = self._upload()
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["image_variants"], {})
+        patched_executor.return_value.submit.assert_not_called()
+
+        for callback in callbacks:
+            callback()
+
+        self.recipe.refresh_from_db()
+        patched_executor.return_value.submit.assert_called_once_with(
+            generate_variants,
+            self.recipe.image.path,
+            VARIANTS,
+        )
+
+    @patch("recipe.images.get_executor", return_value=SyncExecutor())
+    def test_variant_urls_exposed_when_ready(self, patched_executor):
+        """Test the detail view lists the URLs of generated variants"""
+        with self.captureOnCommitCallbacks(execute=True):
+            self._upload()
+
+        res = self.client.get(
+            reverse("recipe:recipe-detail", args=[self.recipe.id]),
+        )
+
+        variants = res.data["image_variants"]
+        self.assertEqual(sorted(variants), ["medium", "thumb"])
+        self.assertTrue(variants["thumb"].endswith("_thumb.jpg"))
+        self.assertTrue(variants["thumb"].startswith("http://testserver/"))
+
+    def test_etag_changes_when_variants_ready(self):
+        """Test responses cached before the variants exist go stale"""
+        url = reverse("recipe:recipe-detail", args=[self.recipe.id])
+        executor = DeferredExecutor()
+        with patch("recipe.images.get_executor", return_value=executor):
+            with self.captureOnCommitCallbacks(execute=True):
+                self._upload()
+            res = self.client.get(url)
+            self.assertEqual(res.data["image_variants"], {})
+
+            executor.run()
+
+        res = self.client.get(url, HTTP_IF_NONE_MATCH=res["ETag"])
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            sorted(res.data["image_variants"]),
+            ["medium", "thumb"],
+        )
+
+
+class ImageUploadValidationTests(TestCase):
+    """Test the memory bounded validation of image uploads"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "user@example.com",
+            "testpass123",
+        )
+        self.client.force_authenticate(self.user)
+        self.recipe = Recipe.objects.create(
+            user=self.user,
+            title="Sample",
+            time_minutes=5,
+            price=Decimal("1.00"),
+        )
+        self.url = reverse(
+            "recipe:recipe-upload-image",
+            args=[self.recipe.id],
+        )
+
+    def tearDown(self):
+        self.recipe.refresh_from_db()
+        self.recipe.image.delete()
+
+    def _upload(self, size, image_format="JPEG"):
+        with tempfile.NamedTemporaryFile(suffix=".img") as image_file:
+            Image.new("RGB", size).save(image_file, format=image_format)
+            image_file.seek(0)
+            return self.client.post(
+                self.url,
+                {"image": image_file},
+                format="multipart",
+            )
+
+    def test_upload_validates_header_only(self):
+        """Test an acceptable image is not decoded during the upload"""
+        with patch("PIL.ImageFile.ImageFile.load") as patched_load:
+            res = self._upload((10, 10))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        patched_load.assert_not_called()
+
+    @override_settings(RECIPE_IMAGE_MAX_PIXELS=50)
+    def test_detail_update_ignores_image(self):
+        """Test images can not skip the upload validation"""
+        url = reverse("recipe:recipe-detail", args=[self.recipe.id])
+        with tempfile.NamedTemporaryFile(suffix=".png") as image_file:
+            Image.new("RGB", (10, 10)).save(image_file, format="PNG")
+            image_file.seek(0)
+            res = self.client.patch(
+                url,
+                {"image": image_file},
+                format="multipart",
+            )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.recipe.refresh_from_db()
+        self.assertFalse(self.recipe.image)
+
+    @override_settings(RECIPE_IMAGE_MAX_PIXELS=50)
+    def test_pixel_ceiling(self):
+        """Test images over the pixel ceiling are rejected"""
+        res = self._upload((10, 10))
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("50 pixels", str(res.data["image"][0]))
+
+    @override_settings(RECIPE_IMAGE_MAX_DIMENSION=20)
+    def test_oversized_image_downscaled(self):
+        """Test images over the max dimension are stored downscaled"""
+        for image_format in ["JPEG", "PNG"]:
+            res = self._upload((100, 50), image_format)
+
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            self.recipe.refresh_from_db()
+            with Image.open(self.recipe.image.path) as image:
+                self.assertEqual(image.size, (20, 10))
+                self.assertEqual(image.format, image_format)
+
+    @override_settings(MAX_UPLOAD_SIZE=100)
+    def test_max_upload_size(self):
+        """Test uploads over the size cap are dropped while streaming"""
+        res = self._upload((100, 100))
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.recipe.refresh_from_db()
+        self.assertFalse(self.recipe.image)
+
+    def test_invalid_image(self):
+        """Test files that are not images are rejected"""
+        with tempfile.NamedTemporaryFile(suffix=".jpg") as image_file:
+            image_file.write(b"not an image")
+            image_file.seek(0)
+            res = self.client.post(
+                self.url,
+                {"image": image_file},
+                format="multipart",
+            )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class SharedImageTests(TestCase):
+    """Test recipes share identical images and release them"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "user@example.com",
+            "testpass123",
+        )
+        self.client.force_authenticate(self.user)
+        self.recipes = [
+            Recipe.objects.create(
+                user=self.user,
+                title=f"Sample {i}",
+                time_minutes=5,
+                price=Decimal("1.00"),
+            )
+            for i in range(2)
+        ]
+
+    def _upload(self, recipe, color):
+        url = reverse("recipe:recipe-upload-image", args=[recipe.id])
+        with tempfile.NamedTemporaryFile(suffix=".jpg") as image_file:
+            Image.new("RGB", (10, 10), color).save(image_file, format="JPEG")
+            image_file.seek(0)
+            with self.captureOnCommitCallbacks(execute=True):
+                with patch("recipe.images.get_executor"):
+                    self.client.post(
+                        url,
+                        {"image": image_file},
+                        format="multipart",
+                    )
+        recipe.refresh_from_db()
+        return recipe.image
+
+    def test_identical_uploads_share_file(self):
+        """Test the same image uploaded twice is stored once"""
+        first = self._upload(self.recipes[0], "red")
+        second = self._upload(self.recipes[1], "red")
+        self.addCleanup(first.storage.delete, first.name)
+
+        self.assertEqual(first.name, second.name)
+
+    def test_image_released_with_last_reference(self):
+        """Test a shared file is deleted with its last recipe"""
+        image = self._upload(self.recipes[0], "blue")
+        self._upload(self.recipes[1], "blue")
+        self.addCleanup(image.storage.delete, image.name)
+        path = image.path
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(
+                reverse("recipe:recipe-detail", args=[self.recipes[0].id]),
+            )
+        self.assertTrue(os.path.exists(path))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(
+                reverse("recipe:recipe-detail", args=[self.recipes[1].id]),
+            )
+        self.assertFalse(os.path.exists(path))
+
+    def test_replaced_image_released(self):
+        """Test replacing an image deletes the unreferenced old file"""
+        old = self._upload(self.recipes[0], "green")
+        old_path = old.path
+
+        new = self._upload(self.recipes[0], "yellow")
+        self.addCleanup(new.storage.delete, new.name)
+
+        self.assertNotEqual(old.name, new.name)
+        self.assertFalse(os.path.exists(old_path))
+
+    def test_detail_update_keeps_image(self):
+        """Test the detail endpoint neither replaces nor orphans files"""
+        image = self._upload(self.recipes[0], "purple")
+        self.addCleanup(image.storage.delete, image.name)
+        content = io.BytesIO()
+        Image.new("RGB", (10, 10), "orange").save(content, format="PNG")
+        digest = hashlib.sha256(content.getvalue()).hexdigest()
+        new_name = f"uploads/recipe/{digest[:2]}/{digest}.png"
+        self.addCleanup(image.storage.delete, new_name)
+        content.name = "new.png"
+        content.seek(0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(
+                reverse("recipe:recipe-detail", args=[self.recipes[0].id]),
+                {"image": content},
+                format="multipart",
+            )
+
+        self.recipes[0].refresh_from_db()
+        self.assertEqual(self.recipes[0].image.name, image.name)
+        self.assertTrue(image.storage.exists(image.name))
+        self.assertFalse(image.storage.exists(new_name))
+
+    def test_release_waits_for_uploads(self):
+        """Test a file is not released while an upload of it commits"""
+        storage = Recipe._meta.get_field("image").storage
+        name = "uploads/recipe/00/uploading.jpg"
+        os.makedirs(os.path.dirname(storage.path(name)), exist_ok=True)
+        with open(storage.path(name), "wb") as f:
+            f.write(b"image")
+        self.addCleanup(storage.delete, name)
+        # Another worker storing the same file, not committed yet
+        other = psycopg2.connect(**connection.get_connection_params())
+        self.addCleanup(other.close)
+        with other.cursor() as cursor:
+            cursor.execute(
+                "SELECT pg_advisory_xact_lock(%s)",
+                [lock_key(name)],
+            )
+
+        with self.assertRaises(OperationalError), transaction.atomic():
+            with connection.cursor() as cursor:
+                cursor.execute("SET LOCAL lock_timeout = '100ms'")
+            release_image(name)
+
+        self.assertTrue(storage.exists(name))
+        other.rollback()
+        release_image(name)
+        self.assertFalse(storage.exists(name))
@@ -58,7 +58,7 @@ class PrivateIngredientAPITests(TestCase):
         serializer = IngredientSerializer(ingredient, many=True)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data["results"], serializer.data)
 
     def test_retrieve_tags_only_for_user(self):
         """Test retrieving ingredients only for authenticated user"""
@@ -78,7 +78,7 @@ class PrivateIngredientAPITests(TestCase):
         serializer = IngredientSerializer(ingredient, many=True)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data["results"], serializer.data)
 
     def test_update_ingredient(self):
         """Test updating a tag"""
@@ -125,8 +125,8 @@ class PrivateIngredientAPITests(TestCase):
         s2 = IngredientSerializer(in2)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertIn(s1.data, res.data)
-        self.assertNotIn(s2.data, res.data)
+        self.assertIn(s1.data, res.data["results"])
+        self.assertNotIn(s2.data, res.data["results"])
 
     def test_filtered_ingredients_unique(self):
         """Test that the filtered ingredients are unique"""
@@ -153,4 +153,4 @@ class PrivateIngredientAPITests(TestCase):
         res = self.client.get(INGREDIENT_URL, {"assigned_only": 1})
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(res.data), 1)
+        self.assertEqual(len(res.data["results"]), 1)
@@ -1,6 +1,7 @@
 """Test for recipe API"""
 
 from decimal import Decimal
+from unittest.mock import patch
 import tempfile
 import os
 
@@ -14,7 +15,9 @@ from rest_framework import status
 from rest_framework.test import APIClient
 
 from core.models import Recipe, Tag, Ingredient
+from core.testing import QueryBudgetMixin, create_recipe
 
+from recipe.pagination import RecipeCursorPagination
 from recipe.serializers import RecipeSerializer, RecipeDetailSerializer
 
 RECIPES_URL = reverse("recipe:recipe-list")
@@ -30,21 +33,6 @@ def create_user(**params):
     return get_user_model().objects.create_user(**params)
 
 
-def create_recipe(user, **params):
-    """Create and return a sample recipe"""
-    defaults = {
-        "title": "Sample recipe title",
-        "time_minutes": 22,
-        "price": Decimal("5.25"),
-        "description": "Sample description",
-        "link": "http://example.com/recipe.pdf",
-    }
-    defaults.update(params)
-
-    recipe = Recipe.objects.create(user=user, **defaults)
-    return recipe
-
-
 def image_upload_url(recipe_id):
     """Create and return an image upload URL"""
     return reverse("recipe:recipe-upload-image", args=[recipe_id])
@@ -85,7 +73,7 @@ class PrivateRecipeAPITests(TestCase):
         serializer = RecipeSerializer(recipes, many=True)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data["results"], serializer.data)
 
     def test_recipe_list_limited_to_user(self):
         """Test list of recipes is limited to authenticated user"""
@@ -102,7 +90,7 @@ class PrivateRecipeAPITests(TestCase):
         serializer = RecipeSerializer(recipes, many=True)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data["results"], serializer.data)
 
     def test_get_recipe_detail(self):
         """Test get recipe details"""
@@ -441,9 +429,9 @@ class PrivateRecipeAPITests(TestCase):
         s3 = RecipeSerializer(r3)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertIn(s1.data, res.data)
-        self.assertIn(s2.data, res.data)
-        self.assertNotIn(s3.data, res.data)
+        self.assertIn(s1.data, res.data["results"])
+        self.assertIn(s2.data, res.data["results"])
+        self.assertNotIn(s3.data, res.data["results"])
 
     def test_filter_by_ingredients(self):
         """Test filtering by ingredients"""
@@ -470,9 +458,222 @@ class PrivateRecipeAPITests(TestCase):
         s3 = RecipeSerializer(r3)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertIn(s1.data, res.data)
-        self.assertIn(s2.data, res.data)
-        self.assertNotIn(s3.data, res.data)
+        self.assertIn(s1.data, res.data["results"])
+        self.assertIn(s2.data, res.data["results"])
+        self.assertNotIn(s3.data, res.data["results"])
+
+    def test_filter_by_tags_unique(self):
+        """Test a recipe matching several filtered tags is listed once"""
+        recipe = create_recipe(user=self.user)
+        tag1 = Tag.objects.create(user=self.user, name="Tag1")
+        tag2 = Tag.objects.create(user=self.user, name="Tag2")
+        recipe.tags.add(tag1, tag2)
+
+        res = self.client.get(RECIPES_URL, {"tags": f"{tag1.id},{tag2.id}"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data["results"]), 1)
+
+
+class RecipePaginationTests(TestCase):
+    """Test cursor pagination of the recipe list"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user(
+            email="user@example.com",
+            password="testpass123",
+        )
+        self.client.force_authenticate(self.user)
+
+    def _collect_ids(self, params):
+        """Follow next cursors and return every recipe id listed"""
+        ids = []
+        res = self.client.get(RECIPES_URL, params)
+        while True:
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            ids.extend(recipe["id"] for recipe in res.data["results"])
+            if not res.data["next"]:
+                return ids
+            res = self.client.get(res.data["next"])
+
+    def test_page_size(self):
+        """Test the page_size param limits the results"""
+        for i in range(3):
+            create_recipe(user=self.user, title=f"recipe {i}")
+
+        res = self.client.get(RECIPES_URL, {"page_size": 2})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data["results"]), 2)
+        self.assertIsNotNone(res.data["next"])
+        self.assertIsNone(res.data["previous"])
+
+    def test_max_page_size(self):
+        """Test page_size is capped at the max page size"""
+        for i in range(3):
+            create_recipe(user=self.user, title=f"recipe {i}")
+
+        with patch.object(RecipeCursorPagination, "max_page_size", 2):
+            res = self.client.get(RECIPES_URL, {"page_size": 100})
+
+        self.assertEqual(len(res.data["results"]), 2)
+
+    def test_cursor_keeps_filters(self):
+        """Test following cursors keeps the tag filter applied"""
+        tag = Tag.objects.create(user=self.user, name="Tag")
+        tagged = []
+        for i in range(5):
+            recipe = create_recipe(user=self.user, title=f"recipe {i}")
+            if i % 2 == 0:
+                recipe.tags.add(tag)
+                tagged.append(recipe.id)
+
+        ids = self._collect_ids({"tags": tag.id, "page_size": 1})
+
+        self.assertEqual(ids, sorted(tagged, reverse=True))
+
+    def test_cursor_stable_under_inserts(self):
+        """Test recipes created between pages do not shift the next page"""
+        recipes = [create_recipe(user=self.user) for _ in range(4)]
+        res = self.client.get(RECIPES_URL, {"page_size": 2})
+        create_recipe(user=self.user, title="new recipe")
+
+        res = self.client.get(res.data["next"])
+
+        self.assertEqual(
+            [recipe["id"] for recipe in res.data["results"]],
+            [recipes[1].id, recipes[0].id],
+        )
+
+
+class RecipeQueryBudgetTests(QueryBudgetMixin, TestCase):
+    """Test the recipe endpoints run a constant number of queries"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user(
+            email="user@example.com",
+            password="testpass123",
+        )
+        self.client.force_authenticate(self.user)
+
+    def _add_recipes(self, count=5):
+        """Create recipes with tags and ingredients for the user"""
+        start = Recipe.objects.filter(user=self.user).count()
+        for i in range(start, start + count):
+            recipe = create_recipe(user=self.user, title=f"recipe {i}")
+            recipe.tags.add(
+                Tag.objects.create(user=self.user, name=f"tag {i}"),
+            )
+            recipe.ingredients.add(
+                Ingredient.objects.create(user=self.user, name=f"ing {i}"),
+            )
+
+    def test_list_recipes_query_budget(self):
+        """Test listing recipes does not run queries per recipe"""
+        self._add_recipes(2)
+
+        self.assertQueryBudget(
+            lambda: self.client.get(RECIPES_URL),
+            self._add_recipes,
+            max_queries=3,
+        )
+
+    def test_filter_recipes_query_budget(self):
+        """Test filtering recipes does not run queries per recipe"""
+        tag = Tag.objects.create(user=self.user, name="Filter")
+
+        def add_tagged_recipes():
+            self._add_recipes()
+            for recipe in Recipe.objects.filter(user=self.user):
+                recipe.tags.add(tag)
+
+        add_tagged_recipes()
+        self.assertQueryBudget(
+            lambda: self.client.get(RECIPES_URL, {"tags": tag.id}),
+            add_tagged_recipes,
+            max_queries=3,
+        )
+
+    def test_recipe_detail_query_budget(self):
+        """Test recipe detail does not run queries per tag or ingredient"""
+        recipe = create_recipe(user=self.user)
+        url = detail_url(recipe.id)
+
+        def add_attributes():
+            for i in range(5):
+                recipe.tags.add(
+                    Tag.objects.create(user=self.user, name=f"tag {i}"),
+                )
+                recipe.ingredients.add(
+                    Ingredient.objects.create(user=self.user, name=f"i{i}"),
+                )
+
+        self.assertQueryBudget(
+            lambda: self.client.get(url),
+            add_attributes,
+            max_queries=3,
+        )
+
+    def test_create_recipe_query_budget(self):
+        """Test creating a recipe does not run queries per tag/ingredient"""
+        payload = {
+            "title": "Bulk",
+            "time_minutes": 10,
+            "price": Decimal("1.00"),
+            "tags": [],
+            "ingredients": [],
+        }
+        Tag.objects.create(user=self.user, name="existing")
+        Ingredient.objects.create(user=self.user, name="existing")
+
+        def add_names():
+            start = len(payload["tags"])
+            for i in range(start, start + 30):
+                payload["tags"].append({"name": f"tag {i}"})
+                payload["ingredients"].append({"name": f"ingredient {i}"})
+            payload["tags"].append({"name": "existing"})
+            payload["ingredients"].append({"name": "existing"})
+
+        add_names()
+        self.assertQueryBudget(
+            lambda: self.client.post(RECIPES_URL, payload, format="json"),
+            add_names,
+            max_queries=15,
+        )
+
+        recipe = Recipe.objects.filter(user=self.user).latest("id")
+        self.assertEqual(recipe.tags.count(), 61)
+        self.assertEqual(recipe.ingredients.count(), 61)
+        self.assertEqual(
+            Tag.objects.filter(user=self.user, name="existing").count(),
+            1,
+        )
+
+    def test_update_recipe_query_budget(self):
+        """Test updating tags does not run queries per tag"""
+        recipe = create_recipe(user=self.user)
+        Tag.objects.create(user=self.user, name="existing")
+        payload = {"tags": [{"name": "existing"}]}
+
+        def add_names():
+            start = len(payload["tags"])
+            for i in range(start, start + 30):
+                payload["tags"].append({"name": f"tag {i}"})
+
+        add_names()
+        self.assertQueryBudget(
+            lambda: self.client.patch(
+                detail_url(recipe.id),
+                payload,
+                format="json",
+            ),
+            add_names,
+            max_queries=15,
+        )
+
+        self.assertEqual(recipe.tags.count(), 61)
 
 
 class ImageUploadTests(TestCase):
@@ -0,0 +1,102 @@
+"""Test the values() based recipe list"""
+
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from core.models import Recipe, Tag, Ingredient
+from recipe.rows import row_fields
+from recipe.serializers import RecipeSerializer, RecipeDetailSerializer
+
+RECIPES_URL = reverse("recipe:recipe-list")
+
+
+class RowListTests(TestCase):
+    """Test list responses built from rows match the serializer"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "user@example.com",
+            "testpass123",
+        )
+        self.client.force_authenticate(self.user)
+
+        tags = [
+            Tag.objects.create(user=self.user, name=f"Tag ü{i}")
+            for i in range(3)
+        ]
+        ingredients = [
+            Ingredient.objects.create(user=self.user, name=f"Ingredient {i}")
+            for i in range(3)
+        ]
+        prices = [Decimal("5"), Decimal("0.5"), Decimal("999.99")]
+        for i, price in enumerate(prices * 2):
+            recipe = Recipe.objects.create(
+                user=self.user,
+                title=f"Soup \"{i}\"",
+                time_minutes=i,
+                price=price,
+                link="" if i % 2 else f"https://example.com/{i}",
+            )
+            recipe.tags.add(*tags[: i % 4])
+            recipe.ingredients.add(*ingredients[i % 3:])
+
+    def _expected(self, fields=None):
+        recipes = Recipe.objects.filter(user=self.user).order_by("-id")
+        data = RecipeSerializer(
+            recipes,
+            many=True,
+            context={"fields": fields},
+        ).data
+        for item in data:
+            for name in ["tags", "ingredients"]:
+                if name in item:
+                    item[name] = sorted(item[name], key=lambda t: t["id"])
+        return JSONRenderer().render(data)
+
+    def _results(self, params=None):
+        res = self.client.get(RECIPES_URL, params)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return JSONRenderer().render(res.data["results"])
+
+    def test_list_matches_serializer(self):
+        """Test the list is byte identical to RecipeSerializer output"""
+        self.assertEqual(self._results(), self._expected())
+
+    def test_sparse_list_matches_serializer(self):
+        """Test selected fields are byte identical too"""
+        fields = ["title", "price", "ingredients"]
+
+        self.assertEqual(
+            self._results({"fields": ",".join(fields)}),
+            self._expected(fields),
+        )
+
+    def test_paginated_rows(self):
+        """Test cursor pages of rows cover every recipe once"""
+        seen = []
+        res = self.client.get(RECIPES_URL, {"page_size": 4})
+        while True:
+            seen.extend(recipe["id"] for recipe in res.data["results"])
+            if not res.data["next"]:
+                break
+            res = self.client.get(res.data["next"])
+
+        self.assertEqual(
+            seen,
+            list(
+                Recipe.objects.order_by("-id").values_list("id", flat=True),
+            ),
+        )
+
+    def test_instance_fields_not_supported(self):
+        """Test serializers with computed fields use the regular path"""
+        self.assertIsNotNone(row_fields(RecipeSerializer()))
+        self.assertIsNone(row_fields(RecipeDetailSerializer()))
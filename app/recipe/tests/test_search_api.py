@@ -0,0 +1,136 @@
+"""Test full text search on the recipe API"""
+
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe, Tag
+from core.testing import create_recipe
+
+RECIPES_URL = reverse("recipe:recipe-list")
+
+
+class RecipeSearchTests(TestCase):
+    """Test the search parameter of the recipe list"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "user@example.com",
+            "testpass123",
+        )
+        self.client.force_authenticate(self.user)
+
+    def _search(self, search, **params):
+        res = self.client.get(RECIPES_URL, {"search": search, **params})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return res
+
+    def test_search_ranks_title_matches_first(self):
+        """Test title matches rank above description matches"""
+        in_description = create_recipe(
+            self.user,
+            title="Stew",
+            description="Slow cooked with carrots",
+        )
+        in_title = create_recipe(self.user, title="Carrot cake")
+        create_recipe(self.user, title="Apple pie")
+
+        res = self._search("carrots")
+
+        self.assertEqual(
+            [recipe["id"] for recipe in res.data["results"]],
+            [in_title.id, in_description.id],
+        )
+
+    def test_search_websearch_syntax(self):
+        """Test quoted phrases and exclusions are supported"""
+        match = create_recipe(self.user, title="Spicy chicken curry")
+        create_recipe(self.user, title="Chicken curry with spicy rice")
+        create_recipe(self.user, title="Spicy beef curry")
+
+        res = self._search('"spicy chicken" -beef')
+
+        self.assertEqual(
+            [recipe["id"] for recipe in res.data["results"]],
+            [match.id],
+        )
+
+    def test_search_only_own_recipes(self):
+        """Test search is limited to the authenticated user"""
+        other_user = get_user_model().objects.create_user(
+            "other@example.com",
+            "testpass123",
+        )
+        create_recipe(other_user, title="Lemon tart")
+
+        res = self._search("lemon")
+
+        self.assertEqual(res.data["results"], [])
+
+    def test_search_with_tag_filter(self):
+        """Test search combines with the tag filter"""
+        tagged = create_recipe(self.user, title="Pasta bake")
+        create_recipe(self.user, title="Pasta salad")
+        tag = Tag.objects.create(user=self.user, name="Dinner")
+        tagged.tags.add(tag)
+
+        res = self._search("pasta", tags=str(tag.id))
+
+        self.assertEqual(
+            [recipe["id"] for recipe in res.data["results"]],
+            [tagged.id],
+        )
+
+    def test_search_paginates_by_rank(self):
+        """Test cursor pages of search results keep the rank ordering"""
+        for i in range(3):
+            create_recipe(self.user, title=f"Soup {i}", description="soup")
+        for i in range(3):
+            create_recipe(self.user, title=f"Bread {i}", description="soup")
+
+        seen = []
+        res = self._search("soup", page_size=2)
+        while True:
+            seen.extend(recipe["id"] for recipe in res.data["results"])
+            if not res.data["next"]:
+                break
+            res = self.client.get(res.data["next"])
+
+        soups = Recipe.objects.filter(title__startswith="Soup")
+        breads = Recipe.objects.filter(title__startswith="Bread")
+        self.assertEqual(len(seen), 6)
+        self.assertEqual(
+            set(seen[:3]),
+            set(soups.values_list("id", flat=True)),
+        )
+        self.assertEqual(
+            set(seen[3:]),
+            set(breads.values_list("id", flat=True)),
+        )
+
+    def test_search_vector_updated_on_write(self):
+        """Test the stored vector follows title changes and bulk inserts"""
+        recipe = create_recipe(self.user, title="Omelette")
+        recipe.title = "Pancakes"
+        recipe.save()
+        Recipe.objects.bulk_create([
+            Recipe(
+                user=self.user,
+                title="Waffles",
+                time_minutes=5,
+                price=Decimal("1.00"),
+            )
+        ])
+
+        self.assertEqual(self._search("omelette").data["results"], [])
+        self.assertEqual(
+            [r["id"] for r in self._search("pancake").data["results"]],
+            [recipe.id],
+        )
+        self.assertEqual(len(self._search("waffle").data["results"]), 1)
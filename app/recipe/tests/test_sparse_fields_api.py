@@ -0,0 +1,120 @@
+"""Test sparse fieldsets on the recipe API"""
+
+import json
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe, Tag
+from core.testing import QueryBudgetMixin
+
+RECIPES_URL = reverse("recipe:recipe-list")
+EXPORT_URL = reverse("recipe:recipe-export")
+
+
+def detail_url(recipe_id):
+    return reverse("recipe:recipe-detail", args=[recipe_id])
+
+
+class SparseFieldsTests(QueryBudgetMixin, TestCase):
+    """Test the fields and exclude query parameters"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "user@example.com",
+            "testpass123",
+        )
+        self.client.force_authenticate(self.user)
+        self.recipe = Recipe.objects.create(
+            user=self.user,
+            title="Sample recipe",
+            description="Sample description",
+            time_minutes=10,
+            price=Decimal("5.00"),
+        )
+        self.recipe.tags.add(Tag.objects.create(user=self.user, name="Tag"))
+
+    def test_list_fields(self):
+        """Test only the requested fields are returned"""
+        res = self.client.get(RECIPES_URL, {"fields": "id,title"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            res.data["results"],
+            [{"id": self.recipe.id, "title": "Sample recipe"}],
+        )
+
+    def test_retrieve_exclude(self):
+        """Test excluded fields are left out of the detail"""
+        res = self.client.get(
+            detail_url(self.recipe.id),
+            {"exclude": "description,tags,ingredients"},
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotIn("description", res.data)
+        self.assertNotIn("tags", res.data)
+        self.assertEqual(res.data["title"], "Sample recipe")
+        self.assertEqual(res.data["image_variants"], {})
+
+    def test_unknown_field(self):
+        """Test requesting an unknown field is rejected"""
+        res = self.client.get(RECIPES_URL, {"fields": "id,secret"})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_unrequested_data_not_loaded(self):
+        """Test unrequested columns and relations are not queried"""
+        full = self.count_queries(
+            lambda: self.client.get(RECIPES_URL, {"page_size": 10}),
+        )
+
+        with CaptureQueriesContext(connection) as context:
+            self.client.get(
+                RECIPES_URL,
+                {"fields": "id,title,time_minutes", "page_size": 10},
+            )
+        sql = [query["sql"] for query in context.captured_queries]
+
+        self.assertEqual(len(sql), full - 2)
+        self.assertNotIn("core_tag", " ".join(sql))
+        self.assertNotIn('"description"', sql[-1])
+
+    def test_relations_only(self):
+        """Test selecting only relations loads just the recipe ids"""
+        tag = self.recipe.tags.get()
+
+        with CaptureQueriesContext(connection) as context:
+            res = self.client.get(RECIPES_URL, {"fields": "tags"})
+        recipe_sql = next(
+            query["sql"]
+            for query in context.captured_queries
+            if 'FROM "core_recipe"' in query["sql"]
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            res.data["results"],
+            [{"tags": [{"id": tag.id, "name": "Tag"}]}],
+        )
+        self.assertNotIn('"title"', recipe_sql)
+        self.assertNotIn('"search_vector"', recipe_sql)
+
+    def test_export_fields(self):
+        """Test the export honours the selected fields"""
+        tag = self.recipe.tags.get()
+        res = self.client.get(EXPORT_URL, {"fields": "id,tags"})
+        content = b"".join(res.streaming_content).decode()
+
+        self.assertEqual(
+            [json.loads(line) for line in content.splitlines()],
+            [{"id": self.recipe.id, "tags": [{"id": tag.id, "name": "Tag"}]}],
+        )
@@ -59,7 +59,7 @@ class PrivateTagAPITests(TestCase):
         serializer = TagSerializer(tags, many=True)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data["results"], serializer.data)
 
     def test_retrieve_tags_only_for_user(self):
         """Test retrieving tags only for authenticated user"""
@@ -74,7 +74,25 @@ class PrivateTagAPITests(TestCase):
         serializer = TagSerializer(tags, many=True)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data["results"], serializer.data)
+
+    def test_paginate_tags(self):
+        """Test tags are paginated by name with an opaque cursor"""
+        for name in ["a", "b", "c"]:
+            Tag.objects.create(user=self.user, name=name)
+
+        res = self.client.get(TAGS_URL, {"page_size": 2})
+        next_res = self.client.get(res.data["next"])
+
+        self.assertEqual(
+            [tag["name"] for tag in res.data["results"]],
+            ["c", "b"],
+        )
+        self.assertEqual(
+            [tag["name"] for tag in next_res.data["results"]],
+            ["a"],
+        )
+        self.assertIsNone(next_res.data["next"])
 
     def test_update_tag(self):
         """Test updating a tag"""
@@ -123,8 +141,8 @@ class PrivateTagAPITests(TestCase):
         s2 = TagSerializer(tag2)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertIn(s1.data, res.data)
-        self.assertNotIn(s2.data, res.data)
+        self.assertIn(s1.data, res.data["results"])
+        self.assertNotIn(s2.data, res.data["results"])
 
     def test_filtered_tags_unique(self):
         """Test that the filtered tags are unique"""
@@ -156,4 +174,4 @@ class PrivateTagAPITests(TestCase):
         res = self.client.get(TAGS_URL, {"assigned_only": 1})
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(res.data), 1)
+        self.assertEqual(len(res.data["results"]), 1)
@@ -1,11 +1,21 @@
 """Views for the receipe api"""
 
+import tempfile
+
 from drf_spectacular.utils import (
     extend_schema_view,
     extend_schema,
     OpenApiParameter,
     OpenApiTypes,
 )
+from django.conf import settings
+from django.db import transaction
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db.models import Exists, F, FloatField, OuterRef
+from django.db.models.functions import Cast
+from django.core.handlers.asgi import ASGIRequest
+from django.http import FileResponse, StreamingHttpResponse
+
 from rest_framework import (
     viewsets,
     mixins,
@@ -14,7 +24,6 @@ from rest_framework import (
 
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from rest_framework.authentication import TokenAuthentication
 from rest_framework.permissions import IsAuthenticated
 
 from core.models import (
@@ -22,7 +31,36 @@ from core.models import (
     Tag,
     Ingredient,
 )
+from core.renderers import dumps
 from recipe import serializers
+from recipe.async_views import AsyncReadMixin
+from recipe.autocomplete import autocomplete
+from recipe.cache import CachedListMixin, bump_version, conditional_get
+from recipe.images import (
+    collect_released_images,
+    enqueue_variants,
+    release_image_on_commit,
+)
+from recipe.pagination import (
+    RecipeCursorPagination,
+    RecipeAttrCursorPagination,
+)
+from recipe.rows import RowListMixin
+from user.authentication import CachedTokenAuthentication
+
+
+SPARSE_FIELDS_PARAMETERS = [
+    OpenApiParameter(
+        "fields",
+        OpenApiTypes.STR,
+        description="Comma separated list of the fields to return",
+    ),
+    OpenApiParameter(
+        "exclude",
+        OpenApiTypes.STR,
+        description="Comma separated list of the fields to leave out",
+    ),
+]
 
 
 @extend_schema_view(
@@ -38,10 +76,23 @@ from recipe import serializers
                 OpenApiTypes.STR,
                 description="Comma separates list of ingredient IDs to filter",
             ),
+            OpenApiParameter(
+                "search",
+                OpenApiTypes.STR,
+                description="Full text search on title and description, "
+                "results are ordered by relevance",
+            ),
+            *SPARSE_FIELDS_PARAMETERS,
         ]
-    )
+    ),
+    retrieve=extend_schema(parameters=SPARSE_FIELDS_PARAMETERS),
 )
-class RecipeViewSet(viewsets.ModelViewSet):
+class RecipeViewSet(
+    CachedListMixin,
+    RowListMixin,
+    AsyncReadMixin,
+    viewsets.ModelViewSet,
+):
     """View for manage recipe API"""
 
     # serializer converte os dados do model (database)
@@ -50,8 +101,9 @@ class RecipeViewSet(viewsets.ModelViewSet):
     # diz quais objetos serão acessíveis por essa view
     queryset = Recipe.objects.all()
     # autenticacao
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
+    pagination_class = RecipeCursorPagination
 
     def _params_to_ints(self, qs):
         """Convert a list of strings to integers"""
@@ -63,27 +115,96 @@ class RecipeViewSet(viewsets.ModelViewSet):
         queryset = self.queryset
         if tags:
             tag_ids = self._params_to_ints(tags)
-            queryset = queryset.filter(tags__id__in=tag_ids)
+            queryset = queryset.filter(
+                Exists(
+                    Recipe.tags.through.objects.filter(
+                        recipe_id=OuterRef("pk"),
+                        tag_id__in=tag_ids,
+                    )
+                )
+            )
 
         ingredients = self.request.query_params.get("ingredients")
         if ingredients:
             ing_ids = self._params_to_ints(ingredients)
-            queryset = queryset.filter(ingredients__id__in=ing_ids)
+            queryset = queryset.filter(
+                Exists(
+                    Recipe.ingredients.through.objects.filter(
+                        recipe_id=OuterRef("pk"),
+                        ingredient_id__in=ing_ids,
+                    )
+                )
+            )
 
-        return (
-            queryset.filter(user=self.request.user)
-            .order_by(
-                "-id",
+        search = self.request.query_params.get("search")
+        if search:
+            query = SearchQuery(
+                search,
+                config="english",
+                search_type="websearch",
+            )
+            # Cast the real rank so cursor positions round trip exactly
+            queryset = queryset.filter(search_vector=query).annotate(
+                rank=Cast(
+                    SearchRank(F("search_vector"), query),
+                    FloatField(),
+                )
             )
-            .distinct()
+
+        queryset = queryset.filter(user=self.request.user).order_by("-id")
+        selected = self.get_selected_fields()
+        if selected is not None:
+            return self.get_serializer_class().sparse_queryset(
+                queryset,
+                selected,
+            )
+
+        return queryset.defer("search_vector").prefetch_related(
+            "tags",
+            "ingredients",
         )
 
+    def get_selected_fields(self):
+        """Return the fields picked with ?fields= and ?exclude=, or None"""
+        if self.action not in ["list", "retrieve", "export"]:
+            return None
+        fields = self.request.query_params.get("fields")
+        exclude = self.request.query_params.get("exclude")
+        if not fields and not exclude:
+            return None
+        return self.get_serializer_class().select_fields(fields, exclude)
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context["fields"] = self.get_selected_fields()
+        return context
+
+    @conditional_get
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @conditional_get
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
+    @conditional_get
+    async def alist(self, request, *args, **kwargs):
+        return await super().alist(request, *args, **kwargs)
+
+    @conditional_get
+    async def aretrieve(self, request, *args, **kwargs):
+        return await super().aretrieve(request, *args, **kwargs)
+
     def get_serializer_class(self):
         """Return the serializer class for request"""
         if self.action == "list":
             return serializers.RecipeSerializer
         elif self.action == "upload_image":
             return serializers.RecipeImageSerializer
+        elif self.action == "bulk_update":
+            return serializers.RecipeBulkUpdateSerializer
+        elif self.action == "bulk_destroy":
+            return serializers.RecipeBulkDeleteSerializer
 
         return self.serializer_class
 
@@ -91,14 +212,224 @@ class RecipeViewSet(viewsets.ModelViewSet):
         """Create a new recipe"""
         serializer.save(user=self.request.user)
 
+    @extend_schema(
+        request=serializers.RecipeDetailSerializer(many=True),
+        responses={
+            status.HTTP_201_CREATED: serializers.RecipeBulkResultSerializer(
+                many=True,
+            ),
+            status.HTTP_207_MULTI_STATUS: (
+                serializers.RecipeBulkResultSerializer(many=True)
+            ),
+        },
+    )
+    @action(methods=["POST"], detail=False, url_path="bulk")
+    def bulk(self, request):
+        """Create many recipes in a single transaction"""
+        items = request.data
+        if not isinstance(items, list):
+            return Response(
+                {"detail": "Expected a list of recipes."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if len(items) > settings.RECIPE_BULK_MAX_ITEMS:
+            return Response(
+                {
+                    "detail": "At most {} recipes per request.".format(
+                        settings.RECIPE_BULK_MAX_ITEMS,
+                    )
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        results = []
+        valid = []
+        for item in items:
+            serializer = self.get_serializer(data=item)
+            if serializer.is_valid():
+                valid.append(
+                    dict(serializer.validated_data, user=request.user),
+                )
+                results.append(None)
+            else:
+                results.append(
+                    {
+                        "status": status.HTTP_400_BAD_REQUEST,
+                        "errors": serializer.errors,
+                    }
+                )
+
+        if valid:
+            recipes = self.get_serializer(many=True).create(valid)
+            # Not get_queryset(), its list filters could drop new rows
+            created = self.get_serializer(
+                Recipe.objects.filter(
+                    user=request.user,
+                    id__in=[recipe.id for recipe in recipes],
+                )
+                .defer("search_vector")
+                .prefetch_related("tags", "ingredients"),
+                many=True,
+            ).data
+            by_id = {recipe["id"]: recipe for recipe in created}
+            recipes = iter(recipes)
+            results = [
+                result
+                or {
+                    "status": status.HTTP_201_CREATED,
+                    "data": by_id[next(recipes).id],
+                }
+                for result in results
+            ]
+
+        if len(valid) == len(items):
+            response_status = status.HTTP_201_CREATED
+        elif valid:
+            response_status = status.HTTP_207_MULTI_STATUS
+        else:
+            response_status = status.HTTP_400_BAD_REQUEST
+        return Response(results, status=response_status)
+
+    def _owned_ids(self, ids):
+        """Return the ids of the given recipes owned by the user"""
+        return list(
+            Recipe.objects.filter(
+                user=self.request.user,
+                id__in=ids,
+            ).values_list("id", flat=True)
+        )
+
+    def _bulk_result(self, ids, owned_ids):
+        return {
+            "ids": owned_ids,
+            "not_found": sorted(set(ids) - set(owned_ids)),
+        }
+
+    def _change_relations(self, model, field, recipe_ids, change):
+        """Set, add or remove related objects of recipes by name"""
+        through = getattr(Recipe, field).through
+        fk_name = f"{model._meta.model_name}_id"
+        names = change.get("set", change.get("add"))
+        if "set" in change:
+            through.objects.filter(recipe_id__in=recipe_ids).delete()
+        if change.get("remove"):
+            through.objects.filter(
+                recipe_id__in=recipe_ids,
+                **{
+                    f"{model._meta.model_name}__name__in": change["remove"],
+                },
+            ).delete()
+        if names:
+            objs = model.objects.get_or_create_many(self.request.user, names)
+            through.objects.bulk_create(
+                [
+                    through(recipe_id=recipe_id, **{fk_name: obj.id})
+                    for recipe_id in recipe_ids
+                    for obj in objs
+                ],
+                ignore_conflicts=True,
+            )
+
+    @extend_schema(responses=serializers.RecipeBulkChangeResultSerializer)
+    @bulk.mapping.patch
+    def bulk_update(self, request):
+        """Set, add or remove tags and ingredients of many recipes"""
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        ids = serializer.validated_data["ids"]
+
+        with transaction.atomic():
+            owned_ids = self._owned_ids(ids)
+            if owned_ids:
+                for model, field in [
+                    (Tag, "tags"),
+                    (Ingredient, "ingredients"),
+                ]:
+                    if field in serializer.validated_data:
+                        self._change_relations(
+                            model,
+                            field,
+                            owned_ids,
+                            serializer.validated_data[field],
+                        )
+                # Through table writes send no signals
+                bump_version(request.user.id)
+
+        return Response(self._bulk_result(ids, owned_ids))
+
+    @extend_schema(
+        request=serializers.RecipeBulkDeleteSerializer,
+        responses={200: serializers.RecipeBulkChangeResultSerializer},
+    )
+    @bulk.mapping.delete
+    def bulk_destroy(self, request):
+        """Delete many recipes"""
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        ids = serializer.validated_data["ids"]
+
+        with transaction.atomic(), collect_released_images():
+            owned_ids = self._owned_ids(ids)
+            Recipe.objects.filter(id__in=owned_ids).delete()
+
+        return Response(self._bulk_result(ids, owned_ids))
+
+    @extend_schema(
+        responses={(200, "application/x-ndjson"): OpenApiTypes.STR},
+    )
+    @action(methods=["GET"], detail=False, url_path="export")
+    def export(self, request):
+        """Stream the user's recipes as newline delimited JSON"""
+        queryset = self.get_queryset().iterator(
+            chunk_size=settings.RECIPE_EXPORT_CHUNK_SIZE,
+        )
+        serializer = serializers.RecipeDetailSerializer(
+            context=self.get_serializer_context(),
+        )
+
+        def lines():
+            for recipe in queryset:
+                yield dumps(serializer.to_representation(recipe)) + b"\n"
+
+        if isinstance(request._request, ASGIRequest):
+            # Django 4.1 iterates streaming responses on the event loop,
+            # where the queries of lines() can not run. Write the export
+            # in this thread instead, spilling to disk like request bodies.
+            body = tempfile.SpooledTemporaryFile(
+                max_size=settings.FILE_UPLOAD_MAX_MEMORY_SIZE,
+            )
+            body.writelines(lines())
+            body.seek(0)
+            return FileResponse(
+                body,
+                as_attachment=True,
+                filename="recipes.ndjson",
+                content_type="application/x-ndjson",
+            )
+
+        response = StreamingHttpResponse(
+            lines(),
+            content_type="application/x-ndjson",
+        )
+        response["Content-Disposition"] = (
+            'attachment; filename="recipes.ndjson"'
+        )
+        return response
+
     @action(methods=["POST"], detail=True, url_path="upload-image")
     def upload_image(self, request, pk=None):
         """Upload an image to recipe"""
         recipe = self.get_object()
+        old_image = recipe.image.name
         serializer = self.get_serializer(recipe, data=request.data)
 
         if serializer.is_valid():
-            serializer.save()
+            # The stored file stays locked until the recipe refers to it
+            with transaction.atomic():
+                serializer.save()
+                enqueue_variants(recipe)
+                if old_image != recipe.image.name:
+                    release_image_on_commit(old_image)
             return Response(serializer.data, status=status.HTTP_200_OK)
 
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -117,6 +448,8 @@ class RecipeViewSet(viewsets.ModelViewSet):
     )
 )
 class BaseRecipeAttrViewSet(
+    CachedListMixin,
+    AsyncReadMixin,
     mixins.DestroyModelMixin,
     mixins.UpdateModelMixin,
     mixins.ListModelMixin,
@@ -124,8 +457,37 @@ class BaseRecipeAttrViewSet(
 ):
     """Base viewset forrecipe attributes"""
 
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
+    pagination_class = RecipeAttrCursorPagination
+
+    @conditional_get
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @conditional_get
+    async def alist(self, request, *args, **kwargs):
+        return await super().alist(request, *args, **kwargs)
+
+    @extend_schema(
+        parameters=[serializers.AutocompleteQuerySerializer],
+        responses=serializers.TagSerializer(many=True),
+    )
+    @action(methods=["GET"], detail=False, url_path="autocomplete")
+    @conditional_get
+    def autocomplete(self, request):
+        """Return the names best matching a partial name"""
+        params = serializers.AutocompleteQuerySerializer(
+            data=request.query_params,
+        )
+        params.is_valid(raise_exception=True)
+        queryset = autocomplete(
+            self.queryset.filter(user=request.user),
+            params.validated_data["search"],
+            params.validated_data["limit"],
+        )
+        serializer = self.get_serializer(queryset, many=True)
+        return Response(serializer.data)
 
     def get_queryset(self):
         """Retrieve tags for the authenticated user"""
@@ -140,14 +502,17 @@ class BaseRecipeAttrViewSet(
         queryset = self.queryset
 
         if assigned_only:
-            queryset = queryset.filter(recipe__isnull=False)
-
-        return (
-            queryset.filter(user=self.request.user)
-            .order_by(
-                "-name",
+            model = queryset.model
+            queryset = queryset.filter(
+                Exists(
+                    model.recipe_set.through.objects.filter(
+                        **{f"{model._meta.model_name}_id": OuterRef("pk")}
+                    )
+                )
             )
-            .distinct()
+
+        return queryset.filter(user=self.request.user).order_by(
+            "-name",
         )
 
 
@@ -0,0 +1,131 @@
+"""
+Authentication classes for the API
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.utils.translation import gettext_lazy as _
+
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+
+from core.cache import is_shared_cache
+
+
+class LRUCache:
+    """Thread safe in-process LRU cache with a TTL per entry."""
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return the value for key or None if missing or expired"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        """Store value under key, evicting the least recently used entry"""
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+local_token_cache = LRUCache(
+    settings.TOKEN_AUTH_LOCAL_CACHE_SIZE,
+    settings.TOKEN_AUTH_LOCAL_CACHE_TTL,
+)
+
+
+def token_cache_key(key):
+    """Return the shared cache key for a token, without the raw token"""
+    digest = hashlib.sha256(key.encode()).hexdigest()
+    return f"auth:token:{digest}"
+
+
+def invalidate_token(key):
+    """Drop a token from the local and shared caches"""
+    local_token_cache.delete(key)
+    cache.delete(token_cache_key(key))
+
+
+def _deferred_instance(model, values):
+    """Build a model instance with only the given fields loaded"""
+    field_names = [
+        field.attname
+        for field in model._meta.concrete_fields
+        if field.attname in values
+    ]
+    return model.from_db(
+        model.objects.db,
+        field_names,
+        [values[name] for name in field_names],
+    )
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """Token authentication that caches the token to user lookup.
+
+    Lookups are served from an in-process LRU first and the shared Django
+    cache second. Entries are invalidated by the signals in user.signals;
+    other processes drop them after the local TTL. Nothing is cached with
+    a process local cache backend, which could not be invalidated across
+    workers. Entries hold only the user id and active flag, never the
+    password hash or permission flags. Every request gets its own user
+    with the remaining fields deferred, loaded from the database on
+    access.
+    """
+
+    def authenticate_credentials(self, key):
+        if not is_shared_cache():
+            return super().authenticate_credentials(key)
+
+        entry = local_token_cache.get(key)
+        if entry is None:
+            shared_key = token_cache_key(key)
+            entry = cache.get(shared_key)
+            if entry is None:
+                user, token = super().authenticate_credentials(key)
+                entry = {"id": user.id, "is_active": user.is_active}
+                cache.set(shared_key, entry, settings.TOKEN_AUTH_CACHE_TTL)
+                local_token_cache.set(key, entry)
+                return (user, token)
+            local_token_cache.set(key, entry)
+
+        if not entry["is_active"]:
+            raise exceptions.AuthenticationFailed(
+                _("User inactive or deleted.")
+            )
+
+        user = _deferred_instance(get_user_model(), entry)
+        token = _deferred_instance(
+            self.get_model(), {"key": key, "user_id": user.id}
+        )
+        token.user = user
+        return (user, token)
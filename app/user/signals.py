@@ -0,0 +1,29 @@
+"""
+Signal handlers keeping the token authentication cache fresh
+"""
+
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from rest_framework.authtoken.models import Token
+
+from user.authentication import invalidate_token
+
+
+@receiver(post_delete, sender=Token)
+def token_deleted(sender, instance, **kwargs):
+    """Invalidate a deleted token"""
+    invalidate_token(instance.key)
+
+
+@receiver(post_save, sender=get_user_model())
+def user_saved(sender, instance, created, **kwargs):
+    """Invalidate the tokens of a changed or deactivated user"""
+    if created:
+        return
+    for key in Token.objects.filter(user=instance).values_list(
+        "key",
+        flat=True,
+    ):
+        invalidate_token(key)
@@ -0,0 +1,196 @@
+"""
+Tests for the cached token authentication
+"""
+
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from core.testing import QueryBudgetMixin, run_in_other_process
+from user.authentication import (
+    CachedTokenAuthentication,
+    LRUCache,
+    local_token_cache,
+    token_cache_key,
+)
+
+ME_URL = reverse("user:me")
+
+
+class LRUCacheTests(TestCase):
+    """Test the in-process LRU cache"""
+
+    def test_evicts_least_recently_used(self):
+        """Test the cache stays bounded by evicting old entries"""
+        lru = LRUCache(maxsize=2, ttl=60)
+        lru.set("a", 1)
+        lru.set("b", 2)
+        lru.get("a")
+        lru.set("c", 3)
+
+        self.assertEqual(lru.get("a"), 1)
+        self.assertIsNone(lru.get("b"))
+        self.assertEqual(lru.get("c"), 3)
+
+    @patch("user.authentication.time.monotonic")
+    def test_entries_expire(self, patched_monotonic):
+        """Test entries are dropped after the TTL"""
+        lru = LRUCache(maxsize=2, ttl=10)
+        patched_monotonic.return_value = 100
+        lru.set("a", 1)
+
+        patched_monotonic.return_value = 105
+        self.assertEqual(lru.get("a"), 1)
+        patched_monotonic.return_value = 111
+        self.assertIsNone(lru.get("a"))
+
+
+class CachedTokenAuthenticationTests(QueryBudgetMixin, TestCase):
+    """Test authenticating API requests with cached tokens"""
+
+    def setUp(self):
+        local_token_cache.clear()
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            email="test@example.com",
+            password="testpass123",
+            name="Test Name",
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {self.token.key}")
+
+    def _authenticate(self):
+        return CachedTokenAuthentication().authenticate_credentials(
+            self.token.key
+        )
+
+    def test_cached_lookup_skips_database(self):
+        """Test repeated lookups do not query for the token"""
+        first = self.count_queries(self._authenticate)
+        second = self.count_queries(self._authenticate)
+
+        self.assertEqual(first, 1)
+        self.assertEqual(second, 0)
+
+    def test_shared_cache_used_by_other_processes(self):
+        """Test a cold local cache is filled from the shared cache"""
+        self._authenticate()
+        local_token_cache.clear()
+
+        queries = self.count_queries(self._authenticate)
+
+        self.assertEqual(queries, 0)
+
+    def test_cache_holds_no_credentials(self):
+        """Test only the user id and active flag are cached"""
+        self._authenticate()
+        expected = {"id": self.user.id, "is_active": True}
+
+        self.assertEqual(cache.get(token_cache_key(self.token.key)), expected)
+        self.assertEqual(local_token_cache.get(self.token.key), expected)
+
+    def test_cached_user_loads_fields(self):
+        """Test a cached lookup returns a user loading its own fields"""
+        self._authenticate()
+
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["email"], self.user.email)
+        self.assertEqual(res.data["name"], "Test Name")
+
+    def test_update_through_cached_user(self):
+        """Test saving a cached user only writes the changed fields"""
+        self._authenticate()
+
+        self.client.patch(ME_URL, {"name": "New Name"})
+
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.name, "New Name")
+        self.assertEqual(self.user.email, "test@example.com")
+        self.assertTrue(self.user.check_password("testpass123"))
+
+    def test_deleted_token_invalidated(self):
+        """Test a deleted token is rejected"""
+        self.client.get(ME_URL)
+        self.token.delete()
+
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deactivated_user_invalidated(self):
+        """Test a deactivated user is rejected"""
+        self.client.get(ME_URL)
+        self.user.is_active = False
+        self.user.save()
+
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_changed_user_invalidated(self):
+        """Test changes to the user are visible on the next request"""
+        self.client.get(ME_URL)
+        self.client.patch(ME_URL, {"name": "New Name"})
+
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.data["name"], "New Name")
+
+    def test_invalid_token(self):
+        """Test an unknown token is rejected"""
+        self.client.credentials(HTTP_AUTHORIZATION="Token invalid")
+
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_invalidated_by_other_process(self):
+        """Test a token invalidated in another worker is looked up again"""
+        self.client.get(ME_URL)
+        run_in_other_process(
+            "from user.authentication import invalidate_token; "
+            f"invalidate_token('{self.token.key}')"
+        )
+        # As once TOKEN_AUTH_LOCAL_CACHE_TTL has passed
+        local_token_cache.clear()
+
+        queries = self.count_queries(lambda: self.client.get(ME_URL))
+
+        self.assertEqual(queries, 1)
+
+    @override_settings(
+        CACHES={
+            "default": {
+                "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            },
+        }
+    )
+    def test_process_local_cache_not_used(self):
+        """Test lookups are not cached without a shared cache"""
+        self.client.get(ME_URL)
+
+        queries = self.count_queries(lambda: self.client.get(ME_URL))
+
+        self.assertEqual(queries, 1)
+
+    def test_requests_get_own_user(self):
+        """Test cached lookups never share the user between requests"""
+        authentication = CachedTokenAuthentication()
+        first, _ = authentication.authenticate_credentials(self.token.key)
+        first.name = "Changed"
+
+        second, _ = authentication.authenticate_credentials(self.token.key)
+        third, _ = authentication.authenticate_credentials(self.token.key)
+
+        self.assertIsNot(second, third)
+        self.assertEqual(second.name, "Test Name")
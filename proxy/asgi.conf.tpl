@@ -0,0 +1,22 @@
+upstream app {
+    server ${APP_HOST}:${APP_PORT};
+    keepalive 32;
+}
+
+server {
+    listen ${LISTEN_PORT};
+
+    location /static {
+        alias /vol/static;
+  }
+
+    location / {
+        proxy_pass http://app;
+        proxy_http_version 1.1;
+        proxy_set_header Connection "";
+        proxy_set_header Host $host;
+        proxy_set_header X-Forwarded-For $proxy_add_x_forwarded_for;
+        proxy_set_header X-Forwarded-Proto $scheme;
+        client_max_body_size 10M;
+    }
+}
\ No newline at end of file
@@ -8,5 +8,18 @@ python manage.py wait_for_db
 python manage.py collectstatic --noinput
 # run any migrations in case of db changes
 python manage.py migrate
-# run uWSGI service
-uwsgi --socket :9000 --workers 4 --master --enable-threads --module app.wsgi
\ No newline at end of file
+# workers write their metrics to files here, /metrics aggregates them
+export PROMETHEUS_MULTIPROC_DIR=${PROMETHEUS_MULTIPROC_DIR:-/tmp/prometheus}
+rm -rf "$PROMETHEUS_MULTIPROC_DIR"
+mkdir -p "$PROMETHEUS_MULTIPROC_DIR"
+
+if [ "$APP_SERVER" = "asgi" ]; then
+    # run the ASGI app with uvicorn workers, serving HTTP to the proxy
+    gunicorn app.asgi:application \
+        --bind :9000 \
+        --workers 4 \
+        --worker-class uvicorn.workers.UvicornWorker
+else
+    # run uWSGI service
+    uwsgi --socket :9000 --workers 4 --master --enable-threads --module app.wsgi
+fi
\ No newline at end of file